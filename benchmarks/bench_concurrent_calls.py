@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Concurrent Calls Benchmark
+Shows that N simultaneous turns finish in roughly the time of one, now that
+Gemini, Maps and Twilio calls run on their own thread pools. Every caller
+asks for something different and each run gets fresh services, so no
+cache or coalesced request hides the concurrency being measured.
+
+Run: PYTHONPATH=. python benchmarks/bench_concurrent_calls.py [N]
+"""
+
+import asyncio
+import json
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+# Settings are loaded at import time; the fakes below never use these
+for key in ('TWILIO_ACCOUNT_SID', 'TWILIO_AUTH_TOKEN', 'TWILIO_PHONE_NUMBER',
+            'GEMINI_API_KEY', 'GOOGLE_MAPS_API_KEY'):
+    os.environ.setdefault(key, 'bench')
+
+from google.generativeai import protos
+from google.generativeai.types.generation_types import GenerateContentResponse
+
+from services.llm_service import LLMService
+from services.maps_service import MapsService
+from services.sms_service import SMSService
+
+# Simulated round-trip times (seconds)
+GEMINI_LATENCY = 0.8
+MAPS_LATENCY = 0.15
+TWILIO_LATENCY = 0.3
+
+class SlowGeminiModel:
+    def generate_content(self, contents, **kwargs):
+        time.sleep(GEMINI_LATENCY)
+        # "<query> near <location>", as the callers below say it
+        message = next(part for part in reversed(contents[-1]["parts"]) if isinstance(part, str))
+        query, _, location = message.rpartition("\n")[2].partition(" near ")
+        text = json.dumps({"action": "search", "query": query, "location": location})
+        return GenerateContentResponse.from_response(protos.GenerateContentResponse(
+            candidates=[{"content": {"role": "model", "parts": [{"text": text}]}}]
+        ))
+
+class SlowMapsClient:
+    def geocode(self, address):
+        time.sleep(MAPS_LATENCY)
+        return [{'geometry': {'location': {'lat': 45.5048, 'lng': -73.5772}},
+                 'formatted_address': address}]
+
+    def places_nearby(self, keyword, **kwargs):
+        time.sleep(MAPS_LATENCY)
+        return {'results': [
+            {'name': f'{keyword} {i}', 'vicinity': f'{i} Rue Peel', 'rating': 4.5,
+             'place_id': f'{keyword}-{i}', 'types': ['restaurant']}
+            for i in range(5)
+        ]}
+
+    def place(self, place_id, fields=None):
+        time.sleep(MAPS_LATENCY)
+        return {'result': {'formatted_phone_number': '(514) 555-0100'}}
+
+class SlowTwilioClient:
+    def __init__(self):
+        self.messages = self
+
+    def create(self, body, from_, to):
+        time.sleep(TWILIO_LATENCY)
+        return SimpleNamespace(sid='SM-bench')
+
+async def run_turn(llm, maps, sms, caller, i):
+    said = f"dish {i} near {1000 + i} Rue Sherbrooke"
+    response = await llm.process_message(said, [], session_id=caller)
+    args = response['function_args']
+    places = await maps.search_places_async(args['query'], args['location'])
+    await sms.send_sms_async(caller, sms.format_places_sms(places))
+
+async def timed(n):
+    """Time n concurrent turns on services built for this run only"""
+    llm = LLMService("bench", max_workers=n, model=SlowGeminiModel())
+    # Each search also fans its details lookups out on the details pool
+    maps = MapsService("bench", max_workers=n, details_workers=n * 4, client=SlowMapsClient())
+    sms = SMSService(client=SlowTwilioClient(), max_workers=n)
+    try:
+        start = time.perf_counter()
+        await asyncio.gather(*(run_turn(llm, maps, sms, f'+1514555{i:04d}', i) for i in range(n)))
+        return time.perf_counter() - start
+    finally:
+        for service in (llm, maps, sms):
+            service.executor.shutdown()
+        maps.details_executor.shutdown()
+
+async def main(n):
+    single = await timed(1)
+    concurrent = await timed(n)
+
+    print(f"1 call:   {single:.2f}s")
+    print(f"{n} calls: {concurrent:.2f}s ({concurrent / single:.2f}x the single-call time)")
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 20))
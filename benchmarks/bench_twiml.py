@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+TwiML Rendering Benchmark
+Compares the prebuilt TwiMLBuilder with the f-string templates main.py used
+to build every response: raw renders per second, and webhook requests per
+second for one worker (one event loop) serving nothing but the TwiML.
+
+Run: PYTHONPATH=. python benchmarks/bench_twiml.py
+"""
+
+import asyncio
+import time
+
+import httpx
+from fastapi import FastAPI
+from fastapi.responses import Response
+
+from utils.twiml import TwiMLBuilder
+
+BASE_URL = "https://call2map.example.com"
+REPLY = "I found 5 places. The top rated is Kazu with 4.5 stars. Would you like me to text you the full list?"
+
+builder = TwiMLBuilder(BASE_URL, BASE_URL.replace("https://", "wss://") + "/voice/stream")
+
+def fstring_reply(result_text: str) -> str:
+    """The original process-speech template (unescaped)"""
+    return f"""<?xml version="1.0" encoding="UTF-8"?>
+<Response>
+    <Say voice="Polly.Joanna">{result_text}</Say>
+    <Gather input="speech" timeout="8" speechTimeout="auto" action="{BASE_URL}/voice/process-speech" method="POST">
+        <Say voice="Polly.Joanna">Is there anything else I can help you with?</Say>
+    </Gather>
+    <Say voice="Polly.Joanna">Thank you for using Call 2 Map. Goodbye!</Say>
+</Response>"""
+
+def fstring_greeting() -> str:
+    """The original incoming-call template, rebuilt on every call"""
+    return f"""<?xml version="1.0" encoding="UTF-8"?>
+<Response>
+    <Say voice="Polly.Joanna">Hello! Welcome to Call 2 Map. I'm your A I assistant. I can help you find restaurants, stores, and other places near you.</Say>
+    <Gather input="speech" timeout="5" speechTimeout="auto" action="{BASE_URL}/voice/process-speech" method="POST">
+        <Say voice="Polly.Joanna">How can I help you today?</Say>
+    </Gather>
+    <Say voice="Polly.Joanna">I didn't hear anything. Please call back if you need assistance. Goodbye!</Say>
+</Response>"""
+
+def renders_per_second(func, seconds=0.5):
+    count = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        for _ in range(1000):
+            func()
+        count += 1000
+    return count / seconds
+
+def make_app():
+    app = FastAPI()
+
+    @app.post("/fstring/reply")
+    async def legacy_reply():
+        return Response(content=fstring_reply(REPLY), media_type="application/xml")
+
+    @app.post("/builder/reply")
+    async def builder_reply():
+        return Response(content=builder.reply(REPLY), media_type="application/xml")
+
+    @app.post("/fstring/greeting")
+    async def legacy_greeting():
+        return Response(content=fstring_greeting(), media_type="application/xml")
+
+    @app.post("/builder/greeting")
+    async def builder_greeting():
+        return Response(content=builder.greeting, media_type="application/xml")
+
+    return app
+
+async def requests_per_second(client, path, n=3000):
+    start = time.perf_counter()
+    for _ in range(n):
+        response = await client.post(path)
+        response.raise_for_status()
+    return n / (time.perf_counter() - start)
+
+async def bench_requests():
+    transport = httpx.ASGITransport(app=make_app())
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await requests_per_second(client, "/builder/reply", 200)  # Warm up
+        for name in ("greeting", "reply"):
+            legacy = await requests_per_second(client, f"/fstring/{name}")
+            built = await requests_per_second(client, f"/builder/{name}")
+            print(f"{name:9s} f-string {legacy:8,.0f} req/s   builder {built:8,.0f} req/s")
+
+def main():
+    print("Renders per second:")
+    for name, legacy, built in (
+        ("greeting", fstring_greeting, lambda: builder.greeting),
+        ("reply", lambda: fstring_reply(REPLY), lambda: builder.reply(REPLY)),
+    ):
+        legacy_rate = renders_per_second(legacy)
+        built_rate = renders_per_second(built)
+        print(f"{name:9s} f-string {legacy_rate:12,.0f}/s   builder {built_rate:12,.0f}/s")
+
+    print("\nWebhook requests per second (one worker, in-process ASGI):")
+    asyncio.run(bench_requests())
+
+if __name__ == "__main__":
+    main()
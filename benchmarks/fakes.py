@@ -0,0 +1,205 @@
+"""
+Stand-ins for the Gemini, Google Maps and Twilio clients with realistic latency.
+
+Each fake replaces the SDK client a service already accepts (`model=`,
+`client=`), so everything from the webhook down to the SDK call runs for
+real; only the network round-trip is simulated by sleeping for a sample
+of a Latency distribution.
+"""
+
+import hashlib
+import math
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass
+from types import SimpleNamespace
+
+from google.generativeai import protos
+from google.generativeai.types.generation_types import GenerateContentResponse
+
+@dataclass
+class Latency:
+    """Lognormal round-trip time in seconds.
+
+    Half the samples are under `median`; `sigma` widens the tail, and 0
+    makes it a fixed delay.
+    """
+    median: float
+    sigma: float = 0.0
+
+    @classmethod
+    def parse(cls, text: str) -> "Latency":
+        """Parse "0.8" or "0.8:0.4" (median:sigma)"""
+        median, _, sigma = text.partition(":")
+        return cls(float(median), float(sigma or 0.0))
+
+    def sample(self) -> float:
+        if self.sigma <= 0:
+            return self.median
+        return self.median * math.exp(random.gauss(0.0, self.sigma))
+
+    def wait(self):
+        time.sleep(self.sample())
+
+class Counter:
+    """Thread-safe call counts by name"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts = {}
+
+    def add(self, name: str):
+        with self._lock:
+            self.counts[name] = self.counts.get(name, 0) + 1
+
+def _gemini_response(*parts) -> GenerateContentResponse:
+    return GenerateContentResponse.from_response(protos.GenerateContentResponse(
+        candidates=[{"content": {"role": "model", "parts": list(parts)}}]
+    ))
+
+_SENTENCES = re.compile(r"(?<=[.?!])\s+")
+_NEAR = re.compile(r"\b(?:near|around)\s+([\w .'-]+?)(?=\s+(?:and|for|with|instead)\b|[?.!,]|$)")
+_SEARCH = re.compile(
+    r"\b(?:looking for|find|nearest|need an?|about|like|top)\s+(.+?)"
+    r"(?=\s+(?:near|around|in|on)\b|[?.!,]|$)"
+)
+_CONTEXT_LOCATION = re.compile(r"caller is near ([^.\]]+)")
+CUISINES = ("sushi", "ramen", "tacos", "pizza", "thai food", "bagels", "pho", "burgers", "dim sum", "falafel")
+
+class FakeGeminiModel:
+    """GenerativeModel stand-in answering with function calls or short speech.
+
+    Each sentence of the utterance is matched by a few keyword rules:
+    "book" becomes get_reservation_info, "send"/"text" becomes send_sms,
+    and "looking for", "find", "nearest"... become search_places. A
+    sentence can add a call, so "send me the list. And what about ramen?"
+    makes two. Anything else gets a spoken reply streamed in a few chunks.
+    The answer only depends on the prompt, so replays are deterministic.
+    """
+
+    REPLY = "Happy to help with that. Is there anything else you need today?"
+
+    def __init__(self, first_token: Latency, per_chunk: Latency, counter: Counter):
+        self.first_token = first_token
+        self.per_chunk = per_chunk
+        self.counter = counter
+
+    def generate_content(self, contents, stream=False, **kwargs):
+        self.counter.add("gemini")
+        chunks = self._answer(contents)
+        if stream:
+            return self._stream(chunks)
+        self.first_token.wait()
+        for _ in chunks[1:]:
+            self.per_chunk.wait()
+        return _gemini_response(*[part for chunk in chunks for part in chunk])
+
+    def _stream(self, chunks):
+        self.first_token.wait()
+        for i, chunk in enumerate(chunks):
+            if i:
+                self.per_chunk.wait()
+            yield _gemini_response(*chunk)
+
+    def _answer(self, contents):
+        message = next(part for part in reversed(contents[-1]["parts"]) if isinstance(part, str))
+        text = message.lower()
+        context = _CONTEXT_LOCATION.search(text)
+        location = context.group(1) if context else "downtown montreal"
+
+        calls = []
+        for sentence in _SENTENCES.split(text.rsplit("\n", 1)[-1]):
+            call = self._call_for(sentence, location)
+            if call is not None and call not in calls:
+                calls.append(call)
+        if calls:
+            return [[{"function_call": call} for call in calls]]
+
+        words = self.REPLY.split(" ")
+        return [[{"text": " ".join(words[i:i + 4]) + " "}] for i in range(0, len(words), 4)]
+
+    @staticmethod
+    def _call_for(sentence: str, location: str):
+        if "book" in sentence or "reserve" in sentence:
+            place = "the second one" if "second" in sentence else "the first one"
+            return {"name": "get_reservation_info", "args": {"place_name": place}}
+        if "send" in sentence or "text" in sentence:
+            return {"name": "send_sms", "args": {}}
+        search = _SEARCH.search(sentence)
+        if search is None:
+            return None
+        near = _NEAR.search(sentence)
+        if near is not None and "there" not in near.group(1):
+            location = near.group(1).strip()
+        return {"name": "search_places", "args": {"query": search.group(1).strip(), "location": location}}
+
+class FakeMapsClient:
+    """googlemaps.Client stand-in; results are stable per query and location"""
+
+    def __init__(self, geocode: Latency, nearby: Latency, details: Latency, counter: Counter):
+        self.geocode_latency = geocode
+        self.nearby_latency = nearby
+        self.details_latency = details
+        self.counter = counter
+
+    def geocode(self, address):
+        self.counter.add("maps.geocode")
+        self.geocode_latency.wait()
+        seed = int(hashlib.md5(address.encode()).hexdigest()[:6], 16)
+        lat, lng = 45.45 + (seed % 1000) / 10000, -73.65 + (seed // 1000 % 1000) / 10000
+        return [{"geometry": {"location": {"lat": lat, "lng": lng}}, "formatted_address": address}]
+
+    def places_nearby(self, location, keyword, **kwargs):
+        self.counter.add("maps.nearby")
+        self.nearby_latency.wait()
+        prefix = hashlib.md5(f"{keyword}@{location}".encode()).hexdigest()[:10]
+        return {"results": [
+            {
+                "name": f"{keyword.title()} Spot {i + 1}",
+                "vicinity": f"{100 + i * 10} Rue Sainte-Catherine",
+                "rating": round(4.8 - i * 0.2, 1),
+                "user_ratings_total": 250 - i * 30,
+                "place_id": f"{prefix}-{i}",
+                "types": ["restaurant"],
+                "geometry": {"location": {"lat": location[0] + i / 1000, "lng": location[1]}}
+            }
+            for i in range(5)
+        ]}
+
+    def place(self, place_id, fields=None):
+        self.counter.add("maps.details")
+        self.details_latency.wait()
+        online = place_id.endswith(("0", "2"))
+        return {"result": {
+            "formatted_phone_number": "(514) 555-0100",
+            "website": f"https://www.opentable.com/r/{place_id}" if online else f"https://example.com/{place_id}",
+            "url": f"https://maps.google.com/?cid={place_id}",
+            "reservable": online
+        }}
+
+    def find_place(self, input, input_type, fields=None, location_bias=None):
+        self.counter.add("maps.find_place")
+        self.nearby_latency.wait()
+        return {"candidates": [{"place_id": f"found-{input}", "name": input, "formatted_address": "1 Rue Peel"}]}
+
+class FakeTwilioClient:
+    """twilio.rest.Client stand-in for sending texts and updating calls"""
+
+    def __init__(self, latency: Latency, counter: Counter):
+        self.latency = latency
+        self.counter = counter
+        self.messages = self
+
+    def create(self, body, from_, to):
+        self.counter.add("twilio.sms")
+        self.latency.wait()
+        return SimpleNamespace(sid=f"SM{random.getrandbits(64):016x}")
+
+    def calls(self, call_sid):
+        return SimpleNamespace(update=self._update_call)
+
+    def _update_call(self, twiml):
+        self.counter.add("twilio.update_call")
+        self.latency.wait()
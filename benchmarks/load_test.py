@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Webhook Load Test
+Simulates many concurrent callers talking to the FastAPI app in-process:
+each one POSTs /voice/incoming, a few /voice/process-speech turns
+(following /voice/continue while a streamed reply is still being spoken)
+and finally /voice/status. Gemini, Maps and Twilio are replaced by the
+fakes in benchmarks/fakes.py with the latencies given on the command line.
+
+Reports turn latency percentiles, requests per second and memory per
+active session. Settings come from the environment as usual, e.g.
+LLM_STREAMING=false or LLM_WORKERS=64.
+
+Run: PYTHONPATH=. python benchmarks/load_test.py [--callers 500] [--turns 4]
+"""
+
+import argparse
+import asyncio
+import gc
+import logging
+import os
+import random
+import time
+import tracemalloc
+
+# Settings are loaded at import time; the fakes below never use these
+for key, value in (('TWILIO_ACCOUNT_SID', 'ACbench'), ('TWILIO_AUTH_TOKEN', 'bench'),
+                   ('TWILIO_PHONE_NUMBER', '+15145550000'), ('GEMINI_API_KEY', 'bench'),
+                   ('GOOGLE_MAPS_API_KEY', 'AIza-bench')):
+    os.environ.setdefault(key, value)
+
+import httpx
+
+from benchmarks.fakes import CUISINES, Counter, FakeGeminiModel, FakeMapsClient, FakeTwilioClient, Latency
+
+import main
+
+STREETS = ("Rue Peel", "Boulevard Saint-Laurent", "Avenue du Parc", "Rue Sherbrooke", "Rue Notre-Dame")
+
+def script(caller: int, turns: int):
+    """What one caller says: a search, a refinement, a booking, then goodbye"""
+    rng = random.Random(caller)
+    first, second = rng.sample(CUISINES, 2)
+    address = f"{rng.randint(1, 9999)} {rng.choice(STREETS)}"
+    lines = [
+        f"find {first} near {address}",
+        f"hmm maybe something like {second} around there instead",
+        "could you book the second one for me",
+        "great thanks that's everything",
+    ]
+    return [lines[i % len(lines)] for i in range(turns)]
+
+def percentile(samples, q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))] if ordered else 0.0
+
+class LoadTest:
+    def __init__(self, client: httpx.AsyncClient, think: Latency):
+        self.client = client
+        self.think = think
+        self.requests = 0
+        self.errors = 0
+        self.first_reply = []  # Seconds until the first TwiML of a turn
+        self.turn = []  # Seconds until the whole reply was handed to Twilio
+
+    async def post(self, path: str, data: dict) -> str:
+        self.requests += 1
+        response = await self.client.post(path, data=data)
+        if response.status_code >= 400:
+            self.errors += 1
+        return response.text
+
+    async def take_turn(self, call_sid: str, said: str):
+        start = time.perf_counter()
+        twiml = await self.post("/voice/process-speech", {"CallSid": call_sid, "SpeechResult": said})
+        self.first_reply.append(time.perf_counter() - start)
+        while "/voice/continue" in twiml:
+            twiml = await self.post("/voice/continue", {"CallSid": call_sid})
+        self.turn.append(time.perf_counter() - start)
+
+    async def call(self, caller: int, turns: int, delay: float, hang_up: bool = True):
+        await asyncio.sleep(delay)
+        call_sid = f"CA{caller:032d}"
+        await self.post("/voice/incoming", {"CallSid": call_sid, "From": f"+1514{caller:07d}"})
+        for said in script(caller, turns):
+            await self.take_turn(call_sid, said)
+            await asyncio.sleep(self.think.sample())  # The caller listens, then speaks
+        if hang_up:
+            await self.post("/voice/status", {"CallSid": call_sid, "CallStatus": "completed"})
+
+def install_fakes(args) -> Counter:
+    counter = Counter()
+    main.llm_service.model = FakeGeminiModel(args.gemini, args.gemini_chunk, counter)
+    main.maps_service.client = FakeMapsClient(args.maps, args.maps, args.maps, counter)
+    main.sms_service.client = FakeTwilioClient(args.twilio, counter)
+    return counter
+
+async def session_memory(client: httpx.AsyncClient, sessions: int) -> float:
+    """Bytes allocated per call that has been answered once and is still live"""
+    test = LoadTest(client, Latency(0.0))
+    base = 10_000_000
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        await asyncio.gather(*(test.call(base + i, 1, 0.0, hang_up=False) for i in range(sessions)))
+        await main.sms_dispatcher.join()
+        gc.collect()
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    for i in range(sessions):
+        await test.post("/voice/status", {"CallSid": f"CA{base + i:032d}", "CallStatus": "completed"})
+    return (after - before) / sessions
+
+async def run(args):
+    counter = install_fakes(args)
+    await main.app.router.startup()
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://loadtest") as client:
+        test = LoadTest(client, args.think)
+        start = time.perf_counter()
+        await asyncio.gather(*(
+            test.call(i, args.turns, args.ramp * i / args.callers) for i in range(args.callers)
+        ))
+        elapsed = time.perf_counter() - start
+        await main.sms_dispatcher.join()
+
+        per_session = await session_memory(client, args.memory_sessions) if args.memory_sessions else None
+    await main.app.router.shutdown()
+
+    mode = "streaming" if main.settings.llm_streaming else "gather"
+    print(f"{args.callers} callers x {args.turns} turns ({mode}), {elapsed:.1f}s")
+    print(f"  requests:    {test.requests} ({test.requests / elapsed:.0f} req/s), {test.errors} errors")
+    for name, samples in (("first reply", test.first_reply), ("full turn", test.turn)):
+        p50, p95, p99 = (percentile(samples, q) * 1000 for q in (0.5, 0.95, 0.99))
+        print(f"  {name + ':':<12} p50 {p50:.0f}ms  p95 {p95:.0f}ms  p99 {p99:.0f}ms")
+    if per_session is not None:
+        print(f"  memory:      {per_session / 1024:.1f} KB per session ({args.memory_sessions} live sessions)")
+    print(f"  backend calls: {dict(sorted(counter.counts.items()))}")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--callers", type=int, default=500, help="Concurrent callers")
+    parser.add_argument("--turns", type=int, default=4, help="Turns per call")
+    parser.add_argument("--ramp", type=float, default=5.0, help="Seconds over which callers dial in")
+    parser.add_argument("--think", type=Latency.parse, default=Latency(1.0, 0.3),
+                        help="Pause between turns, median[:sigma] seconds")
+    parser.add_argument("--gemini", type=Latency.parse, default=Latency(0.45, 0.35),
+                        help="Gemini time to first chunk")
+    parser.add_argument("--gemini-chunk", type=Latency.parse, default=Latency(0.04, 0.3),
+                        help="Gemini time between streamed chunks")
+    parser.add_argument("--maps", type=Latency.parse, default=Latency(0.15, 0.35), help="Maps request latency")
+    parser.add_argument("--twilio", type=Latency.parse, default=Latency(0.3, 0.3), help="Twilio request latency")
+    parser.add_argument("--memory-sessions", type=int, default=200,
+                        help="Live sessions to measure memory with (0 to skip)")
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    logging.getLogger().setLevel(logging.WARNING)  # The app logs every utterance at INFO
+    asyncio.run(run(parse_args()))
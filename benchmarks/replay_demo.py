@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Demo Replay Benchmark
+Replays the scripted conversations in demo/record_demo.py (and any
+recorded transcripts) as calls against the FastAPI app, with Gemini,
+Maps and Twilio replaced by the fixed-latency fakes in benchmarks/fakes.py.
+Every run makes the same external calls in the same order.
+
+For each caller turn it reports the latency and the Gemini, Maps and
+Twilio calls the turn caused (background prefetch and SMS included),
+then compares them with benchmarks/replay_baseline.json. It exits with
+status 1 if any turn makes more Gemini or Maps calls than the baseline,
+or is slower by more than --latency-tolerance.
+
+Run: PYTHONPATH=. python benchmarks/replay_demo.py [--transcript call.json ...] [--update-baseline]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+from typing import Dict, List
+
+import httpx
+
+# Sets placeholder API keys before main loads its settings
+from benchmarks.load_test import LoadTest
+from benchmarks.fakes import Counter, FakeGeminiModel, FakeMapsClient, FakeTwilioClient, Latency
+from demo.record_demo import DEMO_CONVERSATION, EMERGENCY_DEMO, TOURIST_DEMO
+
+import main
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "replay_baseline.json")
+
+# Fixed delays, so latency differences come from the code, not the fakes
+GEMINI = Latency(0.2)
+GEMINI_CHUNK = Latency(0.02)
+MAPS = Latency(0.05)
+TWILIO = Latency(0.05)
+
+CHECKED = ("gemini", "maps")  # Call counts that must never grow
+
+def utterances(script) -> List[str]:
+    """The caller's lines from a demo script, exported transcript or session messages"""
+    if isinstance(script, dict):
+        turns = script.get("turns", script.get("messages", []))
+    else:
+        turns = script
+    lines = []
+    for turn in turns:
+        if isinstance(turn, str):
+            lines.append(turn)
+        elif turn.get("speaker", "").lower() == "user" or turn.get("role") == "user":
+            text = turn.get("text", turn.get("content", "")).strip()
+            if text and not text.startswith("["):  # "[Hangs up]" is a stage direction
+                lines.append(text)
+    return lines
+
+def load_scripts(transcripts: List[str]) -> Dict[str, List[str]]:
+    scripts = {demo["title"]: utterances(demo) for demo in (DEMO_CONVERSATION, EMERGENCY_DEMO, TOURIST_DEMO)}
+    for path in transcripts:
+        with open(path) as f:
+            data = json.load(f)
+        title = data.get("title") if isinstance(data, dict) else None
+        scripts[title or os.path.basename(path)] = utterances(data)
+    return scripts
+
+async def settle():
+    """Wait for the work a turn left running: prefetches, queued texts"""
+    while main.background_tasks or (main.prefetcher and main.prefetcher.stats()['in_flight']):
+        await asyncio.sleep(0.005)
+    await main.sms_dispatcher.join()
+
+def external_calls(counts: Dict[str, int]) -> Dict[str, int]:
+    """Group the fakes' counters by service: gemini, maps, twilio"""
+    grouped = {"gemini": 0, "maps": 0, "twilio": 0}
+    for name, count in counts.items():
+        grouped[name.split(".")[0]] += count
+    return grouped
+
+async def replay(scripts: Dict[str, List[str]]) -> Dict[str, List[Dict]]:
+    counter = Counter()
+    main.llm_service.model = FakeGeminiModel(GEMINI, GEMINI_CHUNK, counter)
+    main.maps_service.client = FakeMapsClient(MAPS, MAPS, MAPS, counter)
+    main.sms_service.client = FakeTwilioClient(TWILIO, counter)
+
+    results = {}
+    await main.app.router.startup()
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://replay") as client:
+        test = LoadTest(client, Latency(0.0))
+        for n, (title, lines) in enumerate(scripts.items()):
+            call_sid = f"CAreplay{n:026d}"
+            await test.post("/voice/incoming", {"CallSid": call_sid, "From": f"+1514555{n:04d}"})
+            turns = []
+            for said in lines:
+                before = dict(counter.counts)
+                await test.take_turn(call_sid, said)
+                await settle()
+                delta = {name: count - before.get(name, 0) for name, count in counter.counts.items()}
+                turns.append({
+                    "said": said,
+                    "latency_ms": round(test.turn[-1] * 1000, 1),
+                    "calls": external_calls(delta),
+                    "detail": {name: count for name, count in sorted(delta.items()) if count}
+                })
+            await test.post("/voice/status", {"CallSid": call_sid, "CallStatus": "completed"})
+            results[title] = turns
+    await main.app.router.shutdown()
+    return results
+
+def compare(results: Dict[str, List[Dict]], baseline: Dict[str, List[Dict]], tolerance: float, slack_ms: float) -> List[str]:
+    """Regressions against the baseline, as readable lines"""
+    failures = []
+    for title, turns in results.items():
+        expected = baseline.get(title)
+        if expected is None:
+            continue
+        for i, (turn, base) in enumerate(zip(turns, expected), 1):
+            where = f"{title}, turn {i} ({turn['said'][:40]!r})"
+            for service in CHECKED:
+                if turn["calls"][service] > base["calls"][service]:
+                    failures.append(
+                        f"{where}: {turn['calls'][service]} {service} calls, baseline {base['calls'][service]}"
+                    )
+            limit = base["latency_ms"] * (1 + tolerance) + slack_ms
+            if turn["latency_ms"] > limit:
+                failures.append(f"{where}: {turn['latency_ms']:.0f}ms, baseline {base['latency_ms']:.0f}ms")
+    return failures
+
+def report(results: Dict[str, List[Dict]]):
+    for title, turns in results.items():
+        print(f"\n{title}")
+        for i, turn in enumerate(turns, 1):
+            calls = turn["calls"]
+            print(
+                f"  {i}. {turn['latency_ms']:7.1f}ms  gemini {calls['gemini']}  maps {calls['maps']}  "
+                f"twilio {calls['twilio']}  {turn['said'][:50]}"
+            )
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--transcript", action="append", default=[],
+                        help="Recorded call (JSON turns or session messages) to replay too")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="Baseline file to compare with")
+    parser.add_argument("--update-baseline", action="store_true", help="Save this run as the baseline")
+    parser.add_argument("--latency-tolerance", type=float, default=0.25,
+                        help="Allowed latency growth per turn, as a fraction of the baseline")
+    parser.add_argument("--latency-slack-ms", type=float, default=30.0,
+                        help="Allowed latency growth per turn on top of the tolerance")
+    return parser.parse_args(argv)
+
+def run(args) -> int:
+    results = asyncio.run(replay(load_scripts(args.transcript)))
+    report(results)
+
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nBaseline saved to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"\nNo baseline at {args.baseline}; run with --update-baseline to create one")
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    failures = compare(results, baseline, args.latency_tolerance, args.latency_slack_ms)
+    if failures:
+        print("\nRegressions:")
+        for failure in failures:
+            print(f"  ✗ {failure}")
+        return 1
+    print("\nNo regressions against the baseline")
+    return 0
+
+if __name__ == "__main__":
+    logging.getLogger().setLevel(logging.WARNING)  # The app logs every utterance at INFO
+    sys.exit(run(parse_args()))
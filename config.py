@@ -1,6 +1,8 @@
 # config.py
+from pydantic import model_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from functools import lru_cache
+from typing import Optional
 
 class Settings(BaseSettings):
     """Application settings loaded from .env file"""
@@ -9,21 +11,100 @@ class Settings(BaseSettings):
     twilio_account_sid: str
     twilio_auth_token: str
     twilio_phone_number: str
+    sms_workers: int = 4
+    sms_queue_size: int = 1000
+    sms_max_attempts: int = 5
+    sms_retry_base: float = 1.0
+    sms_rate_per_minute: float = 6.0
+    sms_rate_burst: int = 3
+    sms_dedupe_window: float = 300.0
+    sms_spool_path: str = ""  # SQLite file that keeps unsent texts across restarts
     
     # Google Gemini Configuration (changed from OpenAI)
     gemini_api_key: str
+    llm_workers: int = 16
+    intent_fast_path: bool = True
+    intent_min_confidence: float = 0.85
+    intent_cache: bool = True
+    intent_cache_size: int = 2048
+    intent_cache_ttl: float = 3600.0
+    intent_cache_similarity: float = 0.65
+    chat_history_turns: int = 6
+    # Gather-mode replies still being streamed are kept in the worker that
+    # took the turn, so /voice/continue must reach the same worker. Unset,
+    # streaming is on only with the single-process "memory" session backend;
+    # set LLM_STREAMING=true with a shared backend only behind sticky routing
+    # (e.g. one worker per instance, or routing on CallSid).
+    llm_streaming: Optional[bool] = None
     
     # Google Maps Configuration
     google_maps_api_key: str
+    maps_details_concurrency: int = 5
+    maps_details_timeout: float = 2.5
+    maps_workers: int = 16
+    maps_details_workers: int = 16
+    geocode_cache_size: int = 512
+    geocode_cache_ttl: float = 86400.0
+    details_cache_size: int = 1024
+    details_cache_bytes: int = 4 * 1024 * 1024
+    details_cache_ttl: float = 1800.0
+    search_prefetch: bool = True
+    # Nearby searches cached per geohash tile (6 is ~1.2 x 0.6 km) and keyword
+    nearby_cache: bool = True
+    nearby_cache_precision: int = 6
+    nearby_cache_size: int = 2048
+    nearby_cache_bytes: int = 8 * 1024 * 1024
+    nearby_cache_ttl: float = 900.0
     
     # Deepgram (Optional)
     deepgram_api_key: str = ""
     
+    # Voice: "gather" uses Twilio speech recognition, "stream" uses Media
+    # Streams with our own STT ("deepgram", or "replay" to read transcripts
+    # from STT_REPLAY_PATH) and voice activity detection. With a TTS provider
+    # replies play over the stream and callers can talk over them;
+    # otherwise they are spoken with <Say>.
+    voice_mode: str = "gather"
+    stt_provider: str = "deepgram"
+    stt_replay_path: str = ""
+    tts_provider: str = ""
+    tts_voice: str = "aura-asteria-en"
+    stream_chunk_ms: int = 100
+    vad_min_energy: float = 250.0
+    vad_hangover_ms: int = 700
+    
+    # Call Sessions: "memory", "sqlite" or "redis" (SESSION_REDIS_URL=local
+    # uses an in-process stand-in)
+    session_backend: str = "memory"
+    session_ttl: float = 1800.0
+    session_max_size: int = 10000
+    session_sqlite_path: str = "sessions.db"
+    session_redis_url: str = "redis://localhost:6379/0"
+    session_workers: int = 8
+    
+    # Outbound HTTP: Maps and Twilio share one keep-alive pool per host
+    # (Gemini uses its own gRPC channel, bounded by LLM_TIMEOUT)
+    http_pool_size: int = 32
+    http_connect_timeout: float = 3.05
+    http_read_timeout: float = 10.0
+    http_pool_block: bool = False
+    http2: bool = False  # Needs the h2 package
+    llm_timeout: float = 30.0
+    
+    # Tracing: turns slower than this are logged with their stage waterfall
+    trace_slow_turn_ms: float = 4000.0
+    
     # Server Configuration
     port: int = 8000
     host: str = "0.0.0.0"
     base_url: str = "http://localhost:8000"
     
+    @model_validator(mode="after")
+    def default_llm_streaming(self):
+        if self.llm_streaming is None:
+            self.llm_streaming = self.session_backend.lower() == "memory"
+        return self
+
     model_config = SettingsConfigDict(
         env_file=".env",
         env_file_encoding='utf-8',
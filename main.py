@@ -3,16 +3,30 @@
 Call2Map - AI Voice Assistant via Phone Call
 Simplified architecture using Twilio's built-in speech recognition
 """
-from fastapi import FastAPI, Request, Form
-from fastapi.responses import Response
+from fastapi import FastAPI, Request, Form, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse, PlainTextResponse, Response
 import uvicorn
 from config import get_settings
+import copy
+import json
 import logging
-from typing import Dict
+from typing import Awaitable, Callable, Dict, List, Optional
 import asyncio
+import time
+from services.http_transport import HTTPTransport
+from services.intent_cache import IntentCache
+from services.intent_matcher import IntentMatcher
 from services.llm_service import LLMService
-from services.maps_service import MapsService
+from services.maps_service import SMS_DETAILS, MapsService
+from services.sms_dispatcher import SMSDispatcher, SMSSpool
 from services.sms_service import SMSService  # ← Fixed import
+from services.place_resolver import PlaceResolver
+from services.prefetch import SearchPrefetcher
+from services.session_store import create_session_store
+from services.speech_service import StreamingSTT, create_stt_factory, create_tts
+from utils.audio_processing import AudioProcessor, MediaChunkPipeline, VoiceActivityDetector
+from utils.tracing import Trace, Tracer, record, span
+from utils.twiml import TwiMLBuilder
 
 # Setup logging
 logging.basicConfig(
@@ -24,23 +38,142 @@ logger = logging.getLogger(__name__)
 settings = get_settings()
 app = FastAPI(title="Call2Map")
 
+# Per-turn stage waterfalls by CallSid and the latency histograms behind /metrics
+tracer = Tracer(
+    max_calls=settings.session_max_size,
+    ttl=settings.session_ttl,
+    slow_turn_ms=settings.trace_slow_turn_ms
+)
+tracer.install()
+
+# Keep-alive connections shared by the Maps and Twilio clients
+http_transport = HTTPTransport(
+    pool_size=settings.http_pool_size,
+    connect_timeout=settings.http_connect_timeout,
+    read_timeout=settings.http_read_timeout,
+    pool_block=settings.http_pool_block,
+    http2=settings.http2
+)
+
 # Initialize services
-llm_service = LLMService(settings.gemini_api_key)
-maps_service = MapsService(settings.google_maps_api_key)
-sms_service = SMSService()
+llm_service = LLMService(
+    settings.gemini_api_key,
+    max_workers=settings.llm_workers,
+    intent_matcher=IntentMatcher(settings.intent_min_confidence) if settings.intent_fast_path else None,
+    intent_cache=IntentCache(
+        maxsize=settings.intent_cache_size,
+        ttl=settings.intent_cache_ttl,
+        similarity=settings.intent_cache_similarity
+    ) if settings.intent_cache else None,
+    history_turns=settings.chat_history_turns,
+    max_sessions=settings.session_max_size,
+    session_ttl=settings.session_ttl,
+    timeout=settings.llm_timeout
+)
+maps_service = MapsService(
+    settings.google_maps_api_key,
+    details_concurrency=settings.maps_details_concurrency,
+    details_timeout=settings.maps_details_timeout,
+    max_workers=settings.maps_workers,
+    details_workers=settings.maps_details_workers,
+    geocode_cache_size=settings.geocode_cache_size,
+    geocode_cache_ttl=settings.geocode_cache_ttl,
+    details_cache_size=settings.details_cache_size,
+    details_cache_bytes=settings.details_cache_bytes,
+    details_cache_ttl=settings.details_cache_ttl,
+    nearby_precision=settings.nearby_cache_precision if settings.nearby_cache else 0,
+    nearby_cache_size=settings.nearby_cache_size,
+    nearby_cache_bytes=settings.nearby_cache_bytes,
+    nearby_cache_ttl=settings.nearby_cache_ttl,
+    transport=http_transport
+)
+sms_service = SMSService(transport=http_transport)
+# Texts go out from background workers; the caller never waits on Twilio Messaging
+sms_dispatcher = SMSDispatcher(
+    sms_service,
+    workers=settings.sms_workers,
+    queue_size=settings.sms_queue_size,
+    max_attempts=settings.sms_max_attempts,
+    retry_base=settings.sms_retry_base,
+    rate_per_minute=settings.sms_rate_per_minute,
+    rate_burst=settings.sms_rate_burst,
+    dedupe_window=settings.sms_dedupe_window,
+    spool=SMSSpool(settings.sms_spool_path) if settings.sms_spool_path else None
+)
 
-# Store active call sessions
-call_sessions: Dict[str, dict] = {}
+# Store active call sessions (in-process, SQLite or Redis; see SESSION_BACKEND)
+call_sessions = create_session_store(settings)
+
+# Matches "book at Kazu" / "the second one" against places the call already heard
+place_resolver = PlaceResolver()
+
+# Warms "text me the list" and "book the top one" while a search result is spoken
+prefetcher = SearchPrefetcher(
+    maps_service,
+    sms_service,
+    store=call_sessions,
+    max_sessions=settings.session_max_size,
+    session_ttl=settings.session_ttl
+) if settings.search_prefetch else None
+
+# Media Streams mode does its own speech recognition (see VOICE_MODE)
+stt_factory = create_stt_factory(settings) if settings.voice_mode == "stream" else None
+# One recognizer per call: replies spoken with <Say> reconnect the stream
+# every turn, and the recognizer carries over until the call ends
+recognizers: Dict[str, StreamingSTT] = {}
+tts_service = create_tts(settings) if settings.voice_mode == "stream" else None
+stream_url = settings.base_url.replace("https://", "wss://").replace("http://", "ws://") + "/voice/stream"
+
+# Static TwiML is rendered once; replies only escape and splice in their text
+twiml = TwiMLBuilder(settings.base_url, stream_url)
+
+# Strong references to fire-and-forget tasks so they aren't garbage collected
+background_tasks = set()
+
+def run_in_background(coro) -> asyncio.Task:
+    """Start a fire-and-forget task, keeping it referenced until it finishes"""
+    task = asyncio.create_task(coro)
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+    return task
+
+ENDED_CALL_STATUSES = {'completed', 'busy', 'failed', 'no-answer', 'canceled'}
+
+# Streamed replies still being spoken with <Say>, by CallSid (see LLM_STREAMING)
+pending_replies: Dict[str, asyncio.Queue] = {}
+# How long /voice/continue holds Twilio's request waiting for the next sentence
+REPLY_WAIT = 10.0
 
 @app.get("/")
 async def root():
     return {
         "status": "Call2Map is running! 🎉",
         "phone": settings.twilio_phone_number,
-        "active_calls": len(call_sessions),
+        "active_calls": await call_sessions.count_async(),
+        "maps_cache": maps_service.cache_stats(),
+        "intent_fast_path": llm_service.intent_matcher.stats() if llm_service.intent_matcher else None,
+        "intent_cache": llm_service.intent_cache.stats() if llm_service.intent_cache else None,
+        "llm_streaming": llm_service.streaming_stats(),
+        "sms": sms_dispatcher.stats(),
+        "prefetch": prefetcher.stats() if prefetcher else None,
+        "place_resolver": place_resolver.stats(),
+        "http_pool": http_transport.stats(),
         "message": "Call this number to talk to the AI assistant!"
     }
 
+@app.get("/metrics")
+async def metrics():
+    """Stage and dependency latency histograms in the Prometheus text format"""
+    return PlainTextResponse(tracer.metrics(), media_type="text/plain; version=0.0.4")
+
+@app.get("/calls/{call_sid}/waterfall")
+async def call_waterfall(call_sid: str):
+    """Recent turns of a call with the timing of every stage, as JSON"""
+    turns = tracer.waterfall(call_sid)
+    if turns is None:
+        return JSONResponse({"error": f"No trace for call {call_sid}"}, status_code=404)
+    return {"call_sid": call_sid, "turns": turns}
+
 @app.get("/health")
 async def health():
     return {"status": "healthy"}
@@ -55,85 +188,345 @@ async def handle_incoming_call(request: Request):
     logger.info(f"📞 Incoming call from {caller_number}, SID: {call_sid}")
 
     # Initialize session
-    call_sessions[call_sid] = {
+    await call_sessions.save_async(call_sid, {
         "caller": caller_number,
         "messages": [],
         "location": None
-    }
+    })
 
-    # TwiML with speech recognition
-    twiml = f"""<?xml version="1.0" encoding="UTF-8"?>
-<Response>
-    <Say voice="Polly.Joanna">Hello! Welcome to Call 2 Map. I'm your A I assistant. I can help you find restaurants, stores, and other places near you.</Say>
-    <Gather input="speech" timeout="5" speechTimeout="auto" action="{settings.base_url}/voice/process-speech" method="POST">
-        <Say voice="Polly.Joanna">How can I help you today?</Say>
-    </Gather>
-    <Say voice="Polly.Joanna">I didn't hear anything. Please call back if you need assistance. Goodbye!</Say>
-</Response>"""
+    if stt_factory is not None:
+        # Stream the caller's audio to /voice/stream instead of <Gather>
+        return Response(content=twiml.stream_greeting, media_type="application/xml")
 
-    return Response(content=twiml, media_type="application/xml")
+    # TwiML with speech recognition
+    return Response(content=twiml.greeting, media_type="application/xml")
 
 @app.post("/voice/process-speech")
 async def process_speech(request: Request):
     """Process speech input from user"""
+    received = time.perf_counter()
     form_data = await request.form()
     speech_result = form_data.get('SpeechResult', '')
     call_sid = form_data.get('CallSid')
+    parsed = time.perf_counter()
 
     logger.info(f"🗣️  User said: {speech_result}")
 
-    if not speech_result or call_sid not in call_sessions:
+    # Get session
+    session = await call_sessions.get_async(call_sid) if call_sid else None
+
+    if not speech_result or session is None:
         return await respond_and_hangup("I didn't catch that. Please try again.")
 
-    # Get session
-    session = call_sessions[call_sid]
-    session['call_sid'] = call_sid
+    if settings.llm_streaming:
+        # Speak the first sentence as soon as it exists; /voice/continue says
+        # the rest. The turn stays open until the whole reply is generated.
+        with tracer.turn(call_sid, started=received) as trace:
+            record("webhook.form", received, parsed)
+            reply = asyncio.Queue()
+            pending_replies[call_sid] = reply
+            trace.hold()
+            run_in_background(stream_turn(call_sid, session, speech_result, reply, trace))
+            return await continue_reply(call_sid)
 
-    # Add to conversation history
-    session['messages'].append({
-        "role": "user",
-        "content": speech_result
-    })
+    try:
+        with tracer.turn(call_sid, started=received):
+            record("webhook.form", received, parsed)
+            result_text = await run_turn(call_sid, session, speech_result)
+            with span("twiml"):
+                content = twiml.reply(result_text)
+        return Response(content=content, media_type="application/xml")
+
+    except Exception as e:
+        logger.error(f"Error processing speech: {e}")
+        return await respond_and_hangup("I'm sorry, I encountered an error. Please try again.")
 
+async def stream_turn(call_sid: str, session: Dict, speech_result: str, reply: asyncio.Queue, trace: Trace):
+    """Run a turn, queueing each sentence of the answer for /voice/continue"""
     try:
+        await run_turn(call_sid, session, speech_result, on_sentence=reply.put)
+    except Exception as e:
+        logger.error(f"Error processing speech: {e}")
+        await reply.put("I'm sorry, I encountered an error. Please try again.")
+    finally:
+        await reply.put(None)
+        trace.release()
+
+@app.post("/voice/continue")
+async def continue_speech(request: Request):
+    """Say the next sentences of a reply that is still being generated"""
+    form_data = await request.form()
+    return await continue_reply(form_data.get('CallSid'))
+
+async def continue_reply(call_sid: str) -> Response:
+    """TwiML for the sentences ready so far, then either a Redirect back here
+    for more or, once the reply is complete, the next Gather"""
+    reply = pending_replies.get(call_sid)
+    sentences, done = [], reply is None
+    if reply is not None:
+        try:
+            sentence = await asyncio.wait_for(reply.get(), REPLY_WAIT)
+            while sentence is not None:
+                sentences.append(sentence)
+                if reply.empty():
+                    break
+                sentence = reply.get_nowait()
+            done = sentence is None
+        except asyncio.TimeoutError:
+            pass
+        if done:
+            pending_replies.pop(call_sid, None)
+
+    with span("twiml"):
+        content = twiml.reply(*sentences) if done else twiml.reply_and_continue(sentences)
+    return Response(content=content, media_type="application/xml")
+
+@app.post("/voice/status")
+async def call_status(request: Request):
+    """Twilio call status callback: drop the session once the call is over"""
+    form_data = await request.form()
+    call_sid = form_data.get('CallSid')
+    call_status = form_data.get('CallStatus')
+
+    if call_sid and call_status in ENDED_CALL_STATUSES:
+        logger.info(f"📴 Call {call_sid} ended ({call_status})")
+        await end_call(call_sid)
+
+    return Response(status_code=204)
+
+async def end_call(call_sid: str):
+    """Forget everything kept for a finished call"""
+    await call_sessions.delete_async(call_sid)
+    llm_service.clear_chat(call_sid)
+    pending_replies.pop(call_sid, None)
+    if prefetcher is not None:
+        prefetcher.cancel(call_sid)
+    stt = recognizers.pop(call_sid, None)
+    if stt is not None:
+        run_in_background(stt.close())
+
+async def run_turn(
+    call_sid: str,
+    session: Dict,
+    speech_result: str,
+    on_sentence: Optional[Callable[[str], Awaitable]] = None
+) -> str:
+    """Answer one caller utterance and save the updated session.
+
+    With `on_sentence` the answer is also delivered through it, a sentence
+    at a time when Gemini replies with speech.
+    """
+    with tracer.turn(call_sid):
+        session['call_sid'] = call_sid
+
+        # Add to conversation history
+        session['messages'].append({
+            "role": "user",
+            "content": speech_result
+        })
+
         # Process with LLM
-        response = await llm_service.process_message(
-            speech_result,
-            session['messages'],
-            session.get('location'),
-            session_id=call_sid
-        )
+        with span("llm"):
+            response = await llm_service.process_message(
+                speech_result,
+                session['messages'],
+                session.get('location'),
+                session_id=call_sid,
+                on_sentence=on_sentence
+            )
 
-        if response['type'] == 'function_call':
-            # Handle function call
-            result_text = await handle_function_call(response, session)
-        else:
-            # Direct text response
-            result_text = response['content']
+        with span("functions"):
+            if response['type'] == 'function_call':
+                # Handle function call
+                result_text = await handle_function_call(response, session)
+            elif response['type'] == 'function_calls':
+                # Several calls from one response, e.g. search and text me
+                result_text = await handle_function_calls(response['calls'], session)
+            else:
+                # Direct text response
+                result_text = response['content']
+
+        if on_sentence is not None and not response.get('streamed'):
+            await on_sentence(result_text)
 
         # Add AI response to history
         session['messages'].append({
             "role": "assistant",
             "content": result_text
         })
+        with span("session.save", settings.session_backend):
+            await call_sessions.save_async(call_sid, session)
 
-        # Create TwiML response
-        twiml = f"""<?xml version="1.0" encoding="UTF-8"?>
-<Response>
-    <Say voice="Polly.Joanna">{result_text}</Say>
-    <Gather input="speech" timeout="8" speechTimeout="auto" action="{settings.base_url}/voice/process-speech" method="POST">
-        <Say voice="Polly.Joanna">Is there anything else I can help you with?</Say>
-    </Gather>
-    <Say voice="Polly.Joanna">Thank you for using Call 2 Map. Goodbye!</Say>
-</Response>"""
+        return result_text
 
-        return Response(content=twiml, media_type="application/xml")
+class MediaStreamCall:
+    """State for one Twilio Media Streams connection"""
 
-    except Exception as e:
-        logger.error(f"Error processing speech: {e}")
-        return await respond_and_hangup("I'm sorry, I encountered an error. Please try again.")
+    # Reply audio is sent in 1 second media messages
+    PLAYBACK_CHUNK = 8000
 
-async def handle_function_call(response: Dict, session: Dict) -> str:
+    def __init__(self, websocket: WebSocket):
+        self.websocket = websocket
+        self.pipeline = MediaChunkPipeline(chunk_ms=settings.stream_chunk_ms)
+        self.vad = VoiceActivityDetector(
+            min_energy=settings.vad_min_energy,
+            hangover_ms=settings.vad_hangover_ms
+        )
+        self.stt = None
+        self.call_sid = None
+        self.stream_sid = None
+        self.turn_task = None
+        # Marks for reply audio Twilio hasn't finished playing yet
+        self.pending_marks = set()
+        self._replies = 0
+
+    @property
+    def speaking(self) -> bool:
+        return bool(self.pending_marks)
+
+    async def start(self, message: Dict):
+        self.call_sid = message['start']['callSid']
+        self.stream_sid = message['start']['streamSid']
+        logger.info(f"🎙️  Media stream started for {self.call_sid}")
+        self.stt = recognizers.get(self.call_sid)
+        if self.stt is None:
+            self.stt = recognizers[self.call_sid] = stt_factory()
+            await self.stt.start()
+
+    async def on_media(self, payload: str):
+        if self.turn_task is not None and not self.turn_task.done():
+            return  # Still answering the last utterance
+
+        for chunk in self.pipeline.push(payload):
+            await self.stt.feed(chunk)
+            for event in self.vad.process(chunk):
+                if event.kind == 'speech_start' and self.speaking:
+                    await self.barge_in()
+                elif event.kind == 'speech_end':
+                    self.end_turn()
+                    return
+
+    async def barge_in(self):
+        """The caller talked over the reply: stop playback and listen"""
+        logger.info(f"✋ Caller barged in on {self.call_sid}")
+        self.pending_marks.clear()
+        await self.websocket.send_text(json.dumps({
+            "event": "clear",
+            "streamSid": self.stream_sid
+        }))
+
+    def on_mark(self, name: str):
+        self.pending_marks.discard(name)
+
+    def end_turn(self):
+        """Speech ended: answer it without waiting for Twilio's speechTimeout"""
+        self.turn_task = run_in_background(self.answer())
+
+    async def answer(self):
+        rest = self.pipeline.flush()
+        if rest is not None:
+            await self.stt.feed(rest)
+        speech_result = await self.stt.end_utterance()
+        logger.info(f"🗣️  User said: {speech_result}")
+
+        session = await call_sessions.get_async(self.call_sid)
+        if not speech_result or session is None:
+            return
+
+        if tts_service is not None:
+            # Synthesize and play each sentence while Gemini writes the next
+            on_sentence = self.say if settings.llm_streaming else None
+            try:
+                result_text = await run_turn(self.call_sid, session, speech_result, on_sentence=on_sentence)
+            except Exception as e:
+                logger.error(f"Error processing speech: {e}")
+                await self.say("I'm sorry, I encountered an error. Please try again.")
+                return
+            if on_sentence is None:
+                await self.say(result_text)
+            return
+
+        try:
+            result_text = await run_turn(self.call_sid, session, speech_result)
+        except Exception as e:
+            logger.error(f"Error processing speech: {e}")
+            result_text = "I'm sorry, I encountered an error. Please try again."
+
+        # No synthesizer: speak with <Say>, then reconnect the stream
+        await sms_service.update_call_async(self.call_sid, twiml.reply_and_stream(result_text))
+
+    async def say(self, text: str):
+        await self.play(await tts_service.synthesize(text))
+
+    async def play(self, mulaw: bytes):
+        """Queue reply audio on the stream, followed by a mark to track it"""
+        for i in range(0, len(mulaw), self.PLAYBACK_CHUNK):
+            await self.websocket.send_text(json.dumps({
+                "event": "media",
+                "streamSid": self.stream_sid,
+                "media": {"payload": AudioProcessor.bytes_to_base64(mulaw[i:i + self.PLAYBACK_CHUNK])}
+            }))
+        self._replies += 1
+        name = f"reply-{self._replies}"
+        self.pending_marks.add(name)
+        await self.websocket.send_text(json.dumps({
+            "event": "mark",
+            "streamSid": self.stream_sid,
+            "mark": {"name": name}
+        }))
+
+    async def close(self):
+        # The recognizer stays open for the next stream; /voice/status closes it
+        logger.info(f"Media stream closed for {self.call_sid}")
+
+@app.websocket("/voice/stream")
+async def media_stream(websocket: WebSocket):
+    """Twilio Media Streams: recognize speech and detect turns ourselves"""
+    if stt_factory is None:
+        logger.warning("Media stream refused: VOICE_MODE is not 'stream'")
+        await websocket.close(code=1008)
+        return
+    await websocket.accept()
+    stream = MediaStreamCall(websocket)
+
+    try:
+        while True:
+            message = json.loads(await websocket.receive_text())
+            event = message.get('event')
+
+            if event == 'start':
+                await stream.start(message)
+            elif event == 'media' and stream.stt is not None:
+                await stream.on_media(message['media']['payload'])
+            elif event == 'mark':
+                stream.on_mark(message['mark']['name'])
+            elif event == 'stop':
+                break
+
+    except WebSocketDisconnect:
+        pass
+    finally:
+        await stream.close()
+
+async def handle_function_calls(calls: List[Dict], session: Dict) -> str:
+    """Execute the function calls of one Gemini response concurrently.
+
+    A send_sms without a message asks for the other calls' results by text,
+    which they send themselves; it only makes a search text even one result.
+    """
+    text_results = any(
+        call['function_name'] == 'send_sms' and not call['function_args'].get('message')
+        for call in calls
+    )
+    if text_results:
+        calls = [call for call in calls if call['function_name'] != 'send_sms' or call['function_args'].get('message')]
+
+    replies = await asyncio.gather(*(
+        handle_function_call(call, session, text_results=text_results) for call in calls
+    ))
+    return " ".join(reply for reply in replies if reply) or "What would you like me to text you?"
+
+async def handle_function_call(response: Dict, session: Dict, text_results: bool = False) -> str:
     """Execute function calls from LLM"""
     function_name = response['function_name']
     function_args = response['function_args']
@@ -152,12 +545,18 @@ async def handle_function_call(response: Dict, session: Dict) -> str:
             # Store location in session
             session['location'] = location
 
-            # Search places
-            places = maps_service.search_places(query, location)
+            # Name, address and rating come with the search; phone numbers
+            # are only needed for the SMS and are fetched off the spoken path
+            places = await maps_service.search_places_async(query, location, detail_limit=0)
 
             if not places:
+                record_result(session, function_name, places=[], texted=False)
                 return f"I couldn't find any {query} near {location}. Could you try a different search?"
 
+            place_resolver.remember(session, places)
+            if prefetcher is not None:
+                prefetcher.start(session.get('call_sid', 'default'), session, query, location, places)
+
             # Format result
             session_id = session.get('call_sid', 'default')
             result_text = await llm_service.format_function_result(
@@ -166,41 +565,48 @@ async def handle_function_call(response: Dict, session: Dict) -> str:
                 session_id=session_id
             )
 
-            # Send SMS with details if multiple results
-            if len(places) > 1:
-                try:
-                    sms_text = sms_service.format_places_sms(places)
-                    sms_service.send_sms(session['caller'], sms_text)
-                    result_text += " I've also sent the details to your phone."
-                except Exception as e:
-                    logger.error(f"SMS error: {e}")
+            # Send SMS with details if multiple results, or if asked to
+            texted = len(places) > 1 or text_results
+            if texted:
+                run_in_background(text_places(session, places))
+                result_text += " I've also sent the details to your phone."
 
+            record_result(session, function_name, places=[
+                {'name': p.get('name'), 'rating': p.get('rating'), 'address': p.get('address')}
+                for p in places
+            ], texted=texted)
             return result_text
 
         elif function_name == 'get_reservation_info':
             place_name = function_args.get('place_name')
             location = function_args.get('location') or session.get('location')
 
-            if not place_name or not location:
+            if not place_name:
                 return "Which restaurant would you like to book at?"
 
-            # First search for the place
-            places = maps_service.search_places(place_name, location)
+            # Usually one of the places the caller just heard about; if not,
+            # one Find Place request instead of a full search
+            place = place_resolver.resolve(session, place_name)
+            if place is None:
+                place = await maps_service.find_place_async(place_name, location)
 
-            if not places:
-                return f"I couldn't find {place_name} near {location}."
+            if not place:
+                return f"I couldn't find {place_name} near {location}." if location else f"I couldn't find {place_name}."
 
-            # Get reservation info for the top result
-            place = places[0]
             place_id = place.get('place_id')
 
             if not place_id:
                 return "I found the restaurant but couldn't get booking details."
 
-            res_info = maps_service.get_reservation_info(place_id)
+            res_info = None
+            if prefetcher is not None:
+                res_info = await prefetcher.reservation(session.get('call_sid', 'default'), session, place_id)
+            if res_info is None:
+                res_info = await maps_service.get_reservation_info_async(place_id)
 
             # Build response
             response = f"For {place['name']}, "
+            texted = False
 
             if res_info.get('booking_url'):
                 platform = res_info.get('platform', 'their website')
@@ -209,10 +615,10 @@ async def handle_function_call(response: Dict, session: Dict) -> str:
                 try:
                     sms_text = f"Book a table at {place['name']}:\n\n"
                     sms_text += f"📱 {res_info['booking_url']}\n\n"
-                    if place.get('phone'):
-                        sms_text += f"Or call: {place['phone']}\n\n"
+                    if res_info.get('phone'):
+                        sms_text += f"Or call: {res_info['phone']}\n\n"
                     sms_text += f"View on map: {res_info.get('maps_url', '')}"
-                    sms_service.send_sms(session['caller'], sms_text)
+                    texted = await sms_dispatcher.send(session['caller'], sms_text)
                     response += "I've texted you the booking link."
                 except Exception as e:
                     logger.error(f"SMS error: {e}")
@@ -225,32 +631,43 @@ async def handle_function_call(response: Dict, session: Dict) -> str:
                     if place.get('address'):
                         sms_text += f"📍 {place['address']}\n\n"
                     sms_text += f"View on map: {res_info.get('maps_url', '')}"
-                    sms_service.send_sms(session['caller'], sms_text)
+                    texted = await sms_dispatcher.send(session['caller'], sms_text)
                     response += "I've texted you their phone number."
                 except Exception as e:
                     logger.error(f"SMS error: {e}")
             else:
                 response += "I don't have booking information, but "
-                if place.get('website'):
+                if res_info.get('website'):
                     response += f"you can check their website. I'll text you the details."
                     try:
                         sms_text = f"{place['name']}:\n\n"
-                        sms_text += f"🌐 {place['website']}\n\n"
-                        if place.get('phone'):
-                            sms_text += f"📞 {place['phone']}"
-                        sms_service.send_sms(session['caller'], sms_text)
+                        sms_text += f"🌐 {res_info['website']}\n\n"
+                        if res_info.get('phone'):
+                            sms_text += f"📞 {res_info['phone']}"
+                        texted = await sms_dispatcher.send(session['caller'], sms_text)
                     except Exception as e:
                         logger.error(f"SMS error: {e}")
                 else:
                     response += "I couldn't find booking information for this restaurant."
 
+            record_result(
+                session, function_name,
+                place=place['name'], method=res_info.get('method', 'unknown'), texted=texted
+            )
             return response
 
         elif function_name == 'send_sms':
             message = function_args.get('message')
             if message:
-                success = sms_service.send_sms(session['caller'], message)
-                return "I've sent the information to your phone." if success else "I had trouble sending the text."
+                queued = await sms_dispatcher.send(session['caller'], message)
+                record_result(session, function_name, texted=queued)
+                return "I'm texting that to you now." if queued else "I had trouble sending the text."
+            # "Text me the list": usually already built by the prefetcher
+            places = place_resolver.last_results(session)
+            if places:
+                run_in_background(text_places(session, places))
+                record_result(session, function_name, texted=True, places=[p.get('name') for p in places])
+                return "I've texted you the list."
             return "I need a message to send."
 
         else:
@@ -262,20 +679,49 @@ async def handle_function_call(response: Dict, session: Dict) -> str:
         traceback.print_exc()
         return "I encountered an issue. Please try again."
 
+def record_result(session: Dict, function_name: str, **result):
+    """Give Gemini a compact result of the call, sent back as its function_response"""
+    llm_service.record_result(session.get('call_sid', 'default'), function_name, result)
+
+async def text_places(session: Dict, places: List[Dict]):
+    """Text the caller a search's results, with phone numbers for the ones listed"""
+    # Details are filled in on a worker thread; keep that off the session's records
+    places = copy.deepcopy(places)
+    try:
+        sms_text = None
+        if prefetcher is not None:
+            sms_text = await prefetcher.sms_text(session.get('call_sid', 'default'), session)
+        if not sms_text:
+            await maps_service.fill_place_details_async(places, SMS_DETAILS, 3)
+            sms_text = sms_service.format_places_sms(places)
+        await sms_dispatcher.send(session['caller'], sms_text)
+    except Exception as e:
+        logger.error(f"SMS error: {e}")
+
 async def respond_and_hangup(message: str) -> Response:
     """Create a TwiML response that says something and hangs up"""
-    twiml = f"""<?xml version="1.0" encoding="UTF-8"?>
-<Response>
-    <Say voice="Polly.Joanna">{message}</Say>
-    <Hangup/>
-</Response>"""
-    return Response(content=twiml, media_type="application/xml")
+    return Response(content=twiml.hangup(message), media_type="application/xml")
+
+@app.on_event("startup")
+async def startup_event():
+    """Start background workers"""
+    await sms_dispatcher.start()
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Cleanup on server shutdown"""
     logger.info("🔄 Shutting down Call2Live...")
-    call_sessions.clear()
+    await sms_dispatcher.stop()
+    call_sessions.close()
+    for service in (llm_service, maps_service, sms_service):
+        service.executor.shutdown()
+    maps_service.details_executor.shutdown()
+    http_transport.close()
+    if tts_service is not None:
+        await tts_service.close()
+    for stt in recognizers.values():
+        await stt.close()
+    recognizers.clear()
 
 if __name__ == "__main__":
     logger.info("=" * 50)
@@ -1,5 +1,5 @@
 # models/conversation.py
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, Field
 from typing import Optional, List, Dict
 from datetime import datetime
 
@@ -30,3 +30,27 @@ class PlaceResult(BaseModel):
     phone: Optional[str] = None
     website: Optional[str] = None
     open_now: Optional[bool] = None
+
+class SearchPlacesArgs(BaseModel):
+    """Arguments of the search_places tool"""
+    model_config = ConfigDict(str_strip_whitespace=True)
+    query: str = Field(min_length=1)
+    location: str = Field(min_length=1)
+
+class ReservationInfoArgs(BaseModel):
+    """Arguments of the get_reservation_info tool"""
+    model_config = ConfigDict(str_strip_whitespace=True)
+    place_name: str = Field(min_length=1)
+    location: str = ""
+
+class SendSmsArgs(BaseModel):
+    """Arguments of the send_sms tool; an empty message texts the turn's results"""
+    model_config = ConfigDict(str_strip_whitespace=True)
+    message: str = ""
+
+# Argument model for each tool Gemini may call
+FUNCTION_ARGS = {
+    'search_places': SearchPlacesArgs,
+    'get_reservation_info': ReservationInfoArgs,
+    'send_sms': SendSmsArgs,
+}
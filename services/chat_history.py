@@ -0,0 +1,101 @@
+# services/chat_history.py
+from collections import deque
+from typing import Dict, List, Optional, Union
+
+def describe_calls(reply: Union[str, List[Dict]]) -> Optional[str]:
+    """One-line summary of the function calls in a reply, or None for text"""
+    if isinstance(reply, str):
+        return None
+    notes = []
+    for call in reply:
+        args = call['args']
+        if call['name'] == 'search_places':
+            notes.append(f"searched for {args.get('query', '')} near {args.get('location', '')}")
+        elif call['name'] == 'get_reservation_info':
+            notes.append(f"asked to book {args.get('place_name', '')}")
+        elif call['name'] == 'send_sms':
+            notes.append("asked for a text")
+    return ", ".join(notes) or None
+
+class ChatHistory:
+    """Bounded Gemini conversation for one call.
+
+    Only the last `max_turns` exchanges are sent back verbatim. Older turns
+    are folded into short notes ("searched for sushi near McGill"), so the
+    prompt stays the same size however long the call runs.
+    """
+
+    def __init__(self, max_turns: int = 6, max_notes: int = 4):
+        self.turns: deque = deque(maxlen=max(1, max_turns))
+        self.notes: deque = deque(maxlen=max_notes)
+
+    @classmethod
+    def from_messages(cls, messages: List[Dict], max_turns: int = 6) -> "ChatHistory":
+        """Rebuild the window from a session's saved `messages`.
+
+        Used when the call's earlier turns were answered by another worker.
+        """
+        history = cls(max_turns)
+        user = None
+        for message in messages:
+            if message.get('role') == 'user':
+                user = message.get('content', '')
+            elif user is not None:
+                history.add(user, message.get('content', ''))
+                user = None
+        return history
+
+    def add(self, user_message: str, reply: Union[str, List[Dict]]):
+        """Record one exchange; `reply` is Gemini's text or its function calls"""
+        if len(self.turns) == self.turns.maxlen:
+            note = describe_calls(self.turns[0][1])
+            if note:
+                self.notes.append(note)
+        self.turns.append((user_message, reply))
+
+    def record_result(self, name: str, result: Dict):
+        """Attach what a function call of the latest turn returned.
+
+        It is sent back as that call's function_response, so follow-ups
+        like "the second one" can be grounded in what was found. Calls
+        without a recorded result are answered with {"status": "done"}.
+        """
+        if not self.turns or isinstance(self.turns[-1][1], str):
+            return
+        for call in self.turns[-1][1]:
+            if call['name'] == name and 'result' not in call:
+                call['result'] = result
+                return
+
+    def contents(self, user_message: str, user_location: Optional[str] = None) -> List[Dict]:
+        """The `contents` for generate_content: the window plus the new message"""
+        contents = []
+        # Each function call is answered at the start of the next user turn
+        responses: List[Dict] = []
+        for user, reply in self.turns:
+            contents.append({"role": "user", "parts": responses + [user]})
+            if isinstance(reply, str):
+                contents.append({"role": "model", "parts": [reply]})
+                responses = []
+            else:
+                contents.append({"role": "model", "parts": [
+                    {"function_call": {"name": call['name'], "args": call['args']}} for call in reply
+                ]})
+                responses = [
+                    {"function_response": {"name": call['name'], "response": call.get('result', {"status": "done"})}}
+                    for call in reply
+                ]
+
+        context = []
+        if user_location:
+            context.append(f"caller is near {user_location}")
+        if self.notes:
+            context.append("earlier the caller " + "; ".join(self.notes))
+        if context:
+            user_message = f"[Context: {'. '.join(context)}]\n{user_message}"
+
+        contents.append({"role": "user", "parts": responses + [user_message]})
+        return contents
+
+    def __len__(self) -> int:
+        return len(self.turns)
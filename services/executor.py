@@ -0,0 +1,78 @@
+# services/executor.py
+import asyncio
+import contextvars
+import functools
+import logging
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Iterable
+
+logger = logging.getLogger(__name__)
+
+class BlockingExecutor:
+    """Run a service's blocking SDK calls off the event loop.
+
+    Each service owns one of these, so a slow dependency can only tie up its
+    own workers: a stalled Gemini reply never starves Maps or Twilio calls,
+    and none of them block other calls on the FastAPI worker.
+    """
+
+    def __init__(self, name: str, max_workers: int):
+        self.name = name
+        self.max_workers = max(1, max_workers)
+        self._pool = ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix=name
+        )
+
+    async def run(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """Await `func(*args, **kwargs)` running on this executor's pool"""
+        loop = asyncio.get_running_loop()
+        # Carry the caller's context variables into the worker thread
+        ctx = contextvars.copy_context()
+        call = functools.partial(ctx.run, func, *args, **kwargs)
+        return await loop.run_in_executor(self._pool, call)
+
+    def submit(self, func: Callable[..., Any], *args, **kwargs) -> Future:
+        """Start `func(*args, **kwargs)` on this executor's pool from a worker thread"""
+        ctx = contextvars.copy_context()
+        return self._pool.submit(ctx.run, func, *args, **kwargs)
+
+    async def iterate(self, func: Callable[..., Iterable], *args, **kwargs) -> AsyncIterator:
+        """Yield the items of the blocking iterable `func(*args, **kwargs)` returns.
+
+        The call and every `next()` run on this executor's pool; items are
+        handed to the event loop as soon as each one arrives. Leaving the
+        loop early stops the worker at the next item.
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        stopped = False
+        end = object()
+
+        def pump():
+            try:
+                for item in func(*args, **kwargs):
+                    if stopped:
+                        return
+                    loop.call_soon_threadsafe(queue.put_nowait, (item, None))
+            except Exception as e:
+                loop.call_soon_threadsafe(queue.put_nowait, (end, e))
+            else:
+                loop.call_soon_threadsafe(queue.put_nowait, (end, None))
+
+        asyncio.ensure_future(self.run(pump))
+        try:
+            while True:
+                item, error = await queue.get()
+                if item is end:
+                    if error is not None:
+                        raise error
+                    return
+                yield item
+        finally:
+            stopped = True
+
+    def shutdown(self, wait: bool = False):
+        """Stop accepting work and release the worker threads"""
+        logger.info(f"Shutting down {self.name} executor")
+        self._pool.shutdown(wait=wait, cancel_futures=True)
@@ -0,0 +1,102 @@
+# services/http_transport.py
+import logging
+import threading
+from typing import Dict
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+class _PooledAdapter(HTTPAdapter):
+    """HTTPAdapter that applies a default timeout and counts requests in flight"""
+
+    def __init__(self, timeout: tuple, **kwargs):
+        self.timeout = timeout
+        self.in_flight: Dict[str, int] = {}
+        self.peak: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        super().__init__(**kwargs)
+
+    def send(self, request, timeout=None, **kwargs):
+        host = urlsplit(request.url).netloc
+        with self._lock:
+            busy = self.in_flight.get(host, 0) + 1
+            self.in_flight[host] = busy
+            self.peak[host] = max(busy, self.peak.get(host, 0))
+        try:
+            return super().send(request, timeout=timeout or self.timeout, **kwargs)
+        finally:
+            with self._lock:
+                self.in_flight[host] -= 1
+
+class HTTPTransport:
+    """One keep-alive connection pool per host, shared by the REST clients.
+
+    Maps and Twilio both speak HTTP/1.1 through `requests`; handing them
+    this transport's `session` means each host's TLS connections are
+    opened once and reused across calls instead of per client. Requests
+    that don't set their own timeout get (`connect_timeout`,
+    `read_timeout`). With `pool_block` a full pool makes callers wait for
+    a connection rather than opening throwaway ones.
+    """
+
+    def __init__(
+        self,
+        pool_size: int = 32,
+        connect_timeout: float = 3.05,
+        read_timeout: float = 10.0,
+        pool_block: bool = False,
+        http2: bool = False
+    ):
+        if http2:
+            _enable_http2()
+        self.pool_size = pool_size
+        self.adapter = _PooledAdapter(
+            timeout=(connect_timeout, read_timeout),
+            pool_connections=8,  # Distinct hosts kept; we talk to a handful
+            pool_maxsize=pool_size,
+            pool_block=pool_block,
+            max_retries=0  # The Maps client and the SMS dispatcher retry themselves
+        )
+        self.session = requests.Session()
+        self.session.mount("https://", self.adapter)
+        self.session.mount("http://", self.adapter)
+
+    def stats(self) -> Dict[str, Dict]:
+        """Per-host pool use: requests, connections opened, busy and idle connections"""
+        hosts = {}
+        pools = self.adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            host = f"{pool.host}:{pool.port}" if pool.port not in (None, 80, 443) else pool.host
+            idle = sum(1 for conn in list(pool.pool.queue) if conn is not None) if pool.pool else 0
+            in_flight = self.adapter.in_flight.get(host, 0)
+            hosts[host] = {
+                'requests': pool.num_requests,
+                'connections_opened': pool.num_connections,
+                'reuse_ratio': round(1 - pool.num_connections / pool.num_requests, 3) if pool.num_requests else 0.0,
+                'in_flight': in_flight,
+                'peak_in_flight': self.adapter.peak.get(host, 0),
+                'idle': idle,
+                'utilization': round(in_flight / self.pool_size, 3)
+            }
+        return hosts
+
+    def close(self):
+        """Close every pooled connection"""
+        self.session.close()
+
+def _enable_http2():
+    """Let urllib3 negotiate HTTP/2 when the optional h2 package is installed"""
+    try:
+        import h2  # noqa: F401
+        import urllib3.http2
+    except ImportError:
+        logger.warning("HTTP2 is set but h2 (or urllib3>=2.3) isn't installed, using HTTP/1.1")
+        return
+    urllib3.http2.inject_into_urllib3()
+    logger.info("HTTP/2 enabled for outbound requests")
@@ -0,0 +1,126 @@
+# services/intent_cache.py
+import copy
+import logging
+import re
+from typing import Dict, FrozenSet, Optional
+
+from utils.cache import TTLCache, normalize_text
+
+logger = logging.getLogger(__name__)
+
+# Words that carry no meaning for matching a request
+STOPWORDS = frozenset("""
+a an the some any please find me search for look looking show i im am want
+need like would could can you to get near in around by close nearby at
+restaurant restaurants place places spot spots one is are where whats
+good best nice great of on with my us
+""".split())
+
+# Utterances that lean on earlier turns, or refine them ("what about ramen
+# instead"), resolve differently each call
+_CONTEXTUAL = re.compile(
+    r"\b(?:it|that|this|there|them|those|these|ones?|same|else|other|another|"
+    r"previous|last|first|second|third|top|instead|rather|also|cheaper|closer)\b|"
+    r"\b(?:what|how)\s+about\b",
+    re.IGNORECASE
+)
+
+def content_tokens(text: str) -> FrozenSet[str]:
+    """The meaningful words of an utterance"""
+    return frozenset(normalize_text(text).split()) - STOPWORDS
+
+def _location_tokens(function_call: Dict) -> FrozenSet[str]:
+    """Words of the locations a parsed call searches near"""
+    calls = function_call.get('calls') or [function_call]
+    words = frozenset()
+    for call in calls:
+        words |= content_tokens(str((call.get('function_args') or {}).get('location') or ""))
+    return words
+
+class IntentCache:
+    """Parsed Gemini function calls, keyed by utterance and caller location.
+
+    A lookup first tries the exact normalized utterance, then a cached
+    utterance for the same location whose words match except for how the
+    place is named: everything but the location words must be the same, so
+    "cheap sushi near McGill" never reuses "sushi near McGill". The
+    location words spoken must overlap by at least `similarity`, so "sushi
+    near McGill" and "sushi near McGill University" share one Gemini
+    round-trip. Only function calls are cached, and never for utterances
+    that refer back to or refine earlier turns.
+    """
+
+    def __init__(self, maxsize: int = 2048, ttl: float = 3600.0, similarity: float = 0.65):
+        self.similarity = similarity
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.exact_hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(utterance: str, location: Optional[str]):
+        return (normalize_text(location or ""), normalize_text(utterance))
+
+    def get(self, utterance: str, location: Optional[str] = None) -> Optional[Dict]:
+        """Return a copy of the cached function call for this utterance, if any"""
+        if _CONTEXTUAL.search(utterance):
+            return None
+
+        key = self._key(utterance, location)
+        entry = self._cache.get(key)
+        if entry is not None:
+            self.exact_hits += 1
+        else:
+            entry = self._most_similar(key[0], content_tokens(utterance))
+            if entry is None:
+                self.misses += 1
+                return None
+            self.similar_hits += 1
+
+        return copy.deepcopy(entry[-1])
+
+    def _most_similar(self, location: str, tokens: FrozenSet[str]):
+        if not tokens:
+            return None
+        best, best_score = None, self.similarity
+        for (entry_location, _), entry in self._cache.items():
+            if entry_location != location:
+                continue
+            query, spoken_location, place_words, _ = entry
+            # Anything that isn't part of the cached place must match exactly
+            if tokens - place_words != query:
+                continue
+            said = tokens & place_words
+            if not said and not spoken_location:
+                score = 1.0
+            elif not said or not spoken_location:
+                continue
+            else:
+                score = len(said & spoken_location) / min(len(said), len(spoken_location))
+            if score >= best_score:
+                best, best_score = entry, score
+        return best
+
+    def set(self, utterance: str, location: Optional[str], function_call: Dict):
+        """Remember the function call Gemini produced for this utterance"""
+        if function_call.get('type') not in ('function_call', 'function_calls') or _CONTEXTUAL.search(utterance):
+            return
+        tokens = content_tokens(utterance)
+        place_words = _location_tokens(function_call)
+        self._cache.set(
+            self._key(utterance, location),
+            (tokens - place_words, tokens & place_words, place_words, copy.deepcopy(function_call))
+        )
+
+    def stats(self) -> Dict:
+        """Exact/similar hit counters and overall hit ratio"""
+        hits = self.exact_hits + self.similar_hits
+        lookups = hits + self.misses
+        return {
+            'size': len(self._cache),
+            'maxsize': self._cache.maxsize,
+            'exact_hits': self.exact_hits,
+            'similar_hits': self.similar_hits,
+            'misses': self.misses,
+            'hit_ratio': round(hits / lookups, 3) if lookups else 0.0
+        }
@@ -0,0 +1,126 @@
+# services/intent_matcher.py
+import logging
+import re
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+_POLITE = r"(?:(?:hi|hey|hello|ok|okay|so|um|uh)[,\s]+)*(?:(?:can|could|would) you\s+|please\s+)?"
+
+SEARCH_PATTERN = re.compile(
+    r"^" + _POLITE +
+    r"(?P<verb>(?:please\s+)?(?:find(?: me)?|search for|look(?:ing)? for|show me|"
+    r"i(?:'m| am) looking for|i(?:'d| would) like|i want|i need|"
+    r"where can i (?:find|get)|where(?:'s| is| are)(?: the)?(?: nearest| closest)?|"
+    r"(?:are there|is there) any)\s+)?"
+    r"(?P<query>.+?)\s+(?:near|in|around|close to|nearby)\s+(?P<location>.+?)[\s.?!]*$",
+    re.IGNORECASE
+)
+
+RESERVE_PATTERN = re.compile(
+    r"^" + _POLITE +
+    r"(?:i(?:'d| would) like to\s+|i want to\s+|let's\s+)?"
+    r"(?:book|reserve|make a reservation|get a table)(?:\s+a table)?(?:\s+for (?:\w+|\d+)(?: people)?)?"
+    r"\s+(?:at|for|with)\s+(?P<place_name>.+?)"
+    r"(?:\s+(?:near|in|around|on)\s+(?P<location>.+?))?[\s.?!]*$",
+    re.IGNORECASE
+)
+
+# Words that refer back to earlier turns; only Gemini can resolve them
+_REFERENCES = re.compile(
+    r"\b(?:it|that|this|there|them|those|these|ones?|same|here|me|my|us|else|other|another)\b",
+    re.IGNORECASE
+)
+
+# Compound or conversational requests that need the full model
+_COMPOUND = re.compile(r"\b(?:and|also|then|but|what about|how about|instead)\b|[,;]", re.IGNORECASE)
+
+_LEADING_FILLER = re.compile(r"^(?:(?:a|an|some|the|any|good|nice|great|best)\s+)+", re.IGNORECASE)
+
+_QUESTION = re.compile(r"^(?:what|which|who|how|when|why|tell|is|are|do|does|can)\b", re.IGNORECASE)
+
+class IntentMatcher:
+    """Resolve obvious utterances to function calls without asking Gemini.
+
+    Produces the same `function_call` dicts as LLMService.process_message
+    for "find X near Y" and "book a table at X" style requests. Anything
+    that refers back to earlier turns, combines several requests or scores
+    below `min_confidence` returns None so the caller falls back to Gemini.
+    """
+
+    def __init__(self, min_confidence: float = 0.85):
+        self.min_confidence = min_confidence
+        self.attempts = 0
+        self.hits = {'search_places': 0, 'get_reservation_info': 0}
+
+    def match(self, utterance: str, user_location: Optional[str] = None) -> Optional[Dict]:
+        """Return a function call for a high-confidence utterance, else None"""
+        self.attempts += 1
+        text = utterance.strip()
+
+        result = self._match_reserve(text, user_location) or self._match_search(text)
+        if result is None:
+            return None
+
+        confidence, function_name, function_args = result
+        if confidence < self.min_confidence:
+            return None
+
+        self.hits[function_name] += 1
+        logger.info(f"Intent fast path ({confidence:.2f}): {function_name} {function_args}")
+        return {
+            "type": "function_call",
+            "function_name": function_name,
+            "function_args": function_args
+        }
+
+    def _match_search(self, text: str):
+        m = SEARCH_PATTERN.match(text)
+        if not m:
+            return None
+
+        query = _LEADING_FILLER.sub("", m.group('query')).strip()
+        location = m.group('location').strip()
+        if not query or not location or _REFERENCES.search(query) or _REFERENCES.search(location):
+            return None
+
+        if m.group('verb'):
+            confidence = 0.95
+        elif len(query.split()) <= 3 and not _QUESTION.match(query):
+            confidence = 0.85  # Bare "sushi near McGill"
+        else:
+            confidence = 0.5
+        if _COMPOUND.search(text):
+            confidence -= 0.3
+        if len(query.split()) > 5 or len(location.split()) > 6:
+            confidence -= 0.2
+
+        return confidence, 'search_places', {"query": query, "location": location}
+
+    def _match_reserve(self, text: str, user_location: Optional[str]):
+        m = RESERVE_PATTERN.match(text)
+        if not m:
+            return None
+
+        place_name = _LEADING_FILLER.sub("", m.group('place_name')).strip()
+        location = (m.group('location') or user_location or "").strip()
+        if not place_name or _REFERENCES.search(place_name):
+            return None
+
+        confidence = 0.95
+        if _COMPOUND.search(text):
+            confidence -= 0.3
+        if len(place_name.split()) > 5:
+            confidence -= 0.2
+
+        return confidence, 'get_reservation_info', {"place_name": place_name, "location": location}
+
+    def stats(self) -> Dict:
+        """Fast-path hit counters"""
+        hits = sum(self.hits.values())
+        return {
+            'attempts': self.attempts,
+            'hits': hits,
+            'by_function': dict(self.hits),
+            'hit_rate': round(hits / self.attempts, 3) if self.attempts else 0.0
+        }
@@ -2,81 +2,213 @@
 import google.generativeai as genai
 import json
 import logging
-from typing import List, Dict, Optional
+import re
+import time
+from collections import deque
+from typing import Awaitable, Callable, List, Dict, Optional, Tuple
+from pydantic import ValidationError
+from models.conversation import FUNCTION_ARGS
+from services.chat_history import ChatHistory
+from services.executor import BlockingExecutor
+from services.intent_cache import IntentCache
+from services.intent_matcher import IntentMatcher
+from utils.cache import TTLCache
+from utils.tracing import record, span
 
 logger = logging.getLogger(__name__)
 
 SYSTEM_PROMPT = """You are a helpful AI assistant that helps people find places and make reservations through phone calls.
 
-When users ask about places, extract the query and location, then respond in JSON format:
-{"action": "search", "query": "what they want", "location": "where"}
-
-When users ask to book or reserve at a specific place:
-{"action": "reserve", "place_name": "restaurant name", "location": "where"}
+Use the tools instead of describing what you would do:
+- search_places when the caller asks about places; extract what they want and where.
+- get_reservation_info when they want to book or reserve at a specific place.
+- send_sms when they ask to be texted; call it alongside the search or booking
+  in the same response, with no message, to text them those results.
 
 Examples:
-- "Find sushi in New York" → {"action": "search", "query": "sushi restaurants", "location": "New York"}
-- "Book a table at Kazu" → {"action": "reserve", "place_name": "Kazu", "location": "current or inferred"}
-- "Make a reservation" → {"action": "reserve", "place_name": "from context", "location": "from context"}
+- "Find sushi in New York" → search_places(query="sushi restaurants", location="New York")
+- "Book a table at Kazu" → get_reservation_info(place_name="Kazu", location="current or inferred")
+- "Find ramen near McGill and text me" → search_places(query="ramen", location="McGill") and send_sms()
 
 Be concise - this is a phone call."""
 
+TOOLS = [{
+    "function_declarations": [
+        {
+            "name": "search_places",
+            "description": "Search Google Maps for places matching a request near a location.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "query": {"type": "string", "description": "What the caller wants, e.g. \"sushi restaurants\""},
+                    "location": {"type": "string", "description": "Where to search, e.g. \"McGill University\""}
+                },
+                "required": ["query", "location"]
+            }
+        },
+        {
+            "name": "get_reservation_info",
+            "description": "Find how to book a table at a specific place and text the caller the details.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "place_name": {"type": "string", "description": "Name of the restaurant"},
+                    "location": {"type": "string", "description": "Area the place is in, if known"}
+                },
+                "required": ["place_name"]
+            }
+        },
+        {
+            "name": "send_sms",
+            "description": "Text the caller. Leave message empty to text them the results of the other calls in this response.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "message": {"type": "string", "description": "Text to send, if not the results"}
+                }
+            }
+        }
+    ]
+}]
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])[\"')\]]*\s+")
+
+class SentenceBuffer:
+    """Split streamed text into sentences as soon as each one is complete.
+
+    Fragments shorter than `min_chars` ("Sure.", "St.") are held back and
+    spoken with the next sentence rather than on their own.
+    """
+
+    def __init__(self, min_chars: int = 12):
+        self.min_chars = min_chars
+        self._text = ""
+
+    def push(self, text: str) -> List[str]:
+        """Add streamed text; return the sentences it completed"""
+        self._text += text
+        sentences = []
+        start = 0
+        for match in _SENTENCE_END.finditer(self._text):
+            sentence = self._text[start:match.start()].strip()
+            if len(sentence) >= self.min_chars:
+                sentences.append(sentence)
+                start = match.end()
+        self._text = self._text[start:]
+        return sentences
+
+    def flush(self) -> Optional[str]:
+        """Whatever is left once the stream ends"""
+        rest, self._text = self._text.strip(), ""
+        return rest or None
+
+def _percentiles(samples) -> Dict[str, Optional[float]]:
+    ordered = sorted(samples)
+    if not ordered:
+        return {'p50': None, 'p95': None}
+    return {
+        'p50': round(ordered[len(ordered) // 2], 1),
+        'p95': round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 1)
+    }
+
 class LLMService:
-    def __init__(self, api_key: str):
+    def __init__(
+        self,
+        api_key: str,
+        max_workers: int = 16,
+        intent_matcher: Optional[IntentMatcher] = None,
+        intent_cache: Optional[IntentCache] = None,
+        history_turns: int = 6,
+        max_sessions: int = 10000,
+        session_ttl: float = 1800.0,
+        timeout: Optional[float] = None,
+        model=None
+    ):
         genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel(
+        self.model = model or genai.GenerativeModel(
             model_name='models/gemini-2.5-flash',  # ← Updated model name
-            system_instruction=SYSTEM_PROMPT
+            system_instruction=SYSTEM_PROMPT,
+            tools=TOOLS
         )
+        # The SDK talks gRPC: one HTTP/2 channel multiplexes every request,
+        # so there is no pool to size, only a deadline per call
+        self.request_options = {'timeout': timeout} if timeout else None
+        # generate_content blocks for the whole Gemini round-trip
+        self.executor = BlockingExecutor("gemini", max_workers)
+        # Obvious requests skip Gemini entirely
+        self.intent_matcher = intent_matcher
+        # ...and near-repeats of requests Gemini already parsed reuse its answer
+        self.intent_cache = intent_cache
+        # Per-call conversation windows; dropped by clear_chat when the call ends
+        self.history_turns = history_turns
+        self.chats = TTLCache(maxsize=max_sessions, ttl=session_ttl)
+        # Streaming latencies in milliseconds for the most recent turns
+        self.first_token_ms: deque = deque(maxlen=1000)
+        self.first_sentence_ms: deque = deque(maxlen=1000)
 
     async def process_message(
         self,
         user_message: str,
         conversation_history: List[Dict],
         user_location: Optional[str] = None,
-        session_id: str = "default"
+        session_id: str = "default",
+        on_sentence: Optional[Callable[[str], Awaitable]] = None
     ) -> Dict:
-        """Process user message"""
+        """Process user message.
 
-        try:
-            # Generate response
-            response = self.model.generate_content(user_message)
-            text = response.text.strip()
-
-            logger.info(f"Gemini response: {text}")
-
-            # Try to parse as JSON for function call
-            if '{' in text and '}' in text:
-                # Extract JSON from response
-                start = text.find('{')
-                end = text.rfind('}') + 1
-                json_str = text[start:end]
-
-                try:
-                    data = json.loads(json_str)
-                    if data.get('action') == 'search':
-                        return {
-                            "type": "function_call",
-                            "function_name": "search_places",
-                            "function_args": {
-                                "query": data.get('query', ''),
-                                "location": data.get('location', '')
-                            }
-                        }
-                    elif data.get('action') == 'reserve':
-                        return {
-                            "type": "function_call",
-                            "function_name": "get_reservation_info",
-                            "function_args": {
-                                "place_name": data.get('place_name', ''),
-                                "location": data.get('location', '')
-                            }
-                        }
-                except json.JSONDecodeError as e:
-                    logger.error(f"JSON parse error: {e}")
+        With `on_sentence`, Gemini's reply is streamed: a spoken reply is
+        passed to `on_sentence` one sentence at a time while it is still
+        being generated, and the returned text result has `streamed` set.
+        Function calls are returned as usual once the JSON is complete.
+        """
+
+        chat = self._get_chat(session_id, conversation_history)
+        result = await self._resolve(user_message, chat, user_location, on_sentence)
+        chat.add(user_message, self._as_reply(result))
+        self.chats.set(session_id, chat)
+        return result
+
+    def _get_chat(self, session_id: str, conversation_history: List[Dict]) -> ChatHistory:
+        chat = self.chats.get(session_id)
+        if chat is None:
+            # The current utterance is already the last entry of the history
+            chat = ChatHistory.from_messages(conversation_history[:-1], self.history_turns)
+        return chat
+
+    async def _resolve(
+        self,
+        user_message: str,
+        chat: ChatHistory,
+        user_location: Optional[str],
+        on_sentence: Optional[Callable[[str], Awaitable]] = None
+    ) -> Dict:
+        if self.intent_matcher is not None:
+            fast_path = self.intent_matcher.match(user_message, user_location)
+            if fast_path is not None:
+                return fast_path
 
-            # Fallback: direct text response
-            return {"type": "text", "content": text}
+        if self.intent_cache is not None:
+            cached = self.intent_cache.get(user_message, user_location)
+            if cached is not None:
+                return cached
+
+        try:
+            # Generate response with the call's recent turns for context
+            contents = chat.contents(user_message, user_location)
+            if on_sentence is not None:
+                result = await self._stream_response(contents, on_sentence)
+            else:
+                with span("gemini.generate", "gemini"):
+                    response = await self.executor.run(
+                        self.model.generate_content, contents, request_options=self.request_options
+                    )
+                text, calls = self._split_parts(response)
+                text = text.strip()
+                logger.info(f"Gemini response: {text} {calls}")
+                result = self._function_calls(calls, text) if calls else self._parse_response(text)
+            if self.intent_cache is not None:
+                self.intent_cache.set(user_message, user_location, result)
+            return result
 
         except Exception as e:
             logger.error(f"Gemini error: {e}")
@@ -85,6 +217,167 @@ class LLMService:
                 "content": "I'm having trouble. Please try again."
             }
 
+    async def _stream_response(self, contents: List[Dict], on_sentence: Callable[[str], Awaitable]) -> Dict:
+        start = time.perf_counter()
+        sentences = SentenceBuffer()
+        text = ""
+        speaking = None  # Decided by the first non-blank character
+        spoken = 0
+        said = 0  # Length of the text already spoken before a JSON action
+
+        async def speak(sentence: str):
+            nonlocal spoken
+            if not spoken:
+                self.first_sentence_ms.append((time.perf_counter() - start) * 1000)
+            spoken += 1
+            await on_sentence(sentence)
+
+        calls = []
+        first_chunk = True
+
+        async for chunk in self.executor.iterate(
+            self.model.generate_content, contents, stream=True, request_options=self.request_options
+        ):
+            if first_chunk:
+                now = time.perf_counter()
+                self.first_token_ms.append((now - start) * 1000)
+                record("gemini.first_token", start, now, "gemini")
+                first_chunk = False
+            piece, chunk_calls = self._split_parts(chunk)
+            calls.extend(chunk_calls)
+            if not piece:
+                continue
+            text += piece
+
+            if speaking is None:
+                head = text.lstrip()
+                if not head:
+                    continue
+                # A JSON action ("{" or a ```json fence) is never spoken
+                speaking = head[0] not in '{`'
+                piece = text
+            if speaking and '{' in piece:
+                # JSON after a preamble: finish saying the preamble now and
+                # parse only what follows it at the end
+                speaking = False
+                cut = piece.index('{')
+                for sentence in sentences.push(piece[:cut]):
+                    await speak(sentence)
+                rest = sentences.flush()
+                if rest:
+                    await speak(rest)
+                said = len(text) - len(piece) + cut
+            if speaking:
+                for sentence in sentences.push(piece):
+                    await speak(sentence)
+
+        record("gemini.stream", start, time.perf_counter(), "gemini")
+        logger.info(f"Gemini response: {text.strip()} {calls}")
+        text = text[said:].strip()
+
+        if speaking:
+            rest = sentences.flush()
+            if rest:
+                await speak(rest)
+            if not calls:
+                return {"type": "text", "content": text, "streamed": True}
+        if calls:
+            # Anything said before the calls has already been spoken
+            return self._function_calls(calls, "" if speaking else text)
+        return self._parse_response(text)
+
+    @staticmethod
+    def _split_parts(response) -> Tuple[str, List[Tuple[str, Dict]]]:
+        """The text and the (name, args) function calls of a response or chunk"""
+        text, calls = "", []
+        for part in response.parts:
+            if 'function_call' in part:
+                calls.append((part.function_call.name, dict(part.function_call.args)))
+            elif 'text' in part:
+                text += part.text
+        return text, calls
+
+    def _function_calls(self, calls: List[Tuple[str, Dict]], text: str = "") -> Dict:
+        """Validate Gemini's function calls and build the result for main.
+
+        One valid call is returned as a `function_call`; several made in the
+        same response as `function_calls`, to be run in one turn.
+        """
+        valid = []
+        for name, args in calls:
+            model = FUNCTION_ARGS.get(name)
+            if model is None:
+                logger.error(f"Gemini called unknown function {name}")
+                continue
+            try:
+                args = model(**args).model_dump()
+            except (TypeError, ValidationError) as e:
+                logger.error(f"Invalid arguments for {name}: {e}")
+                continue
+            valid.append({"type": "function_call", "function_name": name, "function_args": args})
+
+        if len(valid) == 1:
+            return valid[0]
+        if valid:
+            return {"type": "function_calls", "calls": valid}
+        return {"type": "text", "content": text or "Sorry, what are you looking for, and where?"}
+
+    def streaming_stats(self) -> Dict:
+        """First-token and first-sentence latency over recent streamed turns"""
+        return {
+            'turns': len(self.first_token_ms),
+            'first_token_ms': _percentiles(self.first_token_ms),
+            'first_sentence_ms': _percentiles(self.first_sentence_ms)
+        }
+
+    @staticmethod
+    def _as_reply(result: Dict):
+        """The model turn to remember: its text, or the function calls it made"""
+        if result['type'] == 'function_call':
+            return [{"name": result['function_name'], "args": result['function_args']}]
+        if result['type'] == 'function_calls':
+            return [{"name": call['function_name'], "args": call['function_args']} for call in result['calls']]
+        return result['content']
+
+    def _parse_response(self, text: str) -> Dict:
+        """Turn a text reply into a function call or a text response.
+
+        Fallback for replies that spell an action out as JSON instead of
+        calling a tool.
+        """
+        # Try to parse as JSON for function call
+        if '{' in text and '}' in text:
+            # Extract JSON from response
+            start = text.find('{')
+            end = text.rfind('}') + 1
+            json_str = text[start:end]
+
+            try:
+                data = json.loads(json_str)
+                if data.get('action') == 'search':
+                    return {
+                        "type": "function_call",
+                        "function_name": "search_places",
+                        "function_args": {
+                            "query": data.get('query', ''),
+                            "location": data.get('location', '')
+                        }
+                    }
+                elif data.get('action') == 'reserve':
+                    return {
+                        "type": "function_call",
+                        "function_name": "get_reservation_info",
+                        "function_args": {
+                            "place_name": data.get('place_name', ''),
+                            "location": data.get('location', '')
+                        }
+                    }
+            except json.JSONDecodeError as e:
+                logger.error(f"JSON parse error: {e}")
+
+        # Fallback: direct text response
+        return {"type": "text", "content": text}
+
     async def format_function_result(
         self,
         function_name: str,
@@ -117,6 +410,12 @@ class LLMService:
 
         return "Here are the results I found."
 
+    def record_result(self, session_id: str, function_name: str, result: Dict):
+        """Tell the call's conversation what a function call of its latest turn returned"""
+        chat = self.chats.get(session_id)
+        if chat is not None:
+            chat.record_result(function_name, result)
+
     def clear_chat(self, session_id: str):
-        """Clear chat history"""
-        pass
\ No newline at end of file
+        """Forget a call's conversation once it has ended"""
+        self.chats.pop(session_id)
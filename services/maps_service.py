@@ -1,50 +1,149 @@
 # services/maps_service.py
+import copy
 import googlemaps
 import logging
-from typing import List, Dict, Optional
+import threading
+import time
+from concurrent.futures import wait
+from typing import List, Dict, Optional, Sequence
+from services.executor import BlockingExecutor
+from services.http_transport import HTTPTransport
+from utils import geohash
+from utils.cache import TTLCache, normalize_text
+from utils.singleflight import SingleFlight
+from utils.tracing import span
 
 logger = logging.getLogger(__name__)
 
+# Detail fields callers can ask for, and the Places Details field behind each
+DETAIL_FIELDS = {
+    'phone': 'formatted_phone_number',
+    'website': 'website',
+    'maps_url': 'url',
+    'reservable': 'reservable',
+    'open_now': 'opening_hours',
+    'price_level': 'price_level',
+}
+ALL_DETAILS = tuple(DETAIL_FIELDS)
+# What each consumer actually reads
+SMS_DETAILS = ('phone',)
+RESERVATION_DETAILS = ('phone', 'website', 'maps_url', 'reservable')
+
+# Nearby-search result fields kept in the tile cache
+NEARBY_FIELDS = ('name', 'vicinity', 'rating', 'user_ratings_total', 'place_id', 'types', 'geometry')
+
 class MapsService:
-    def __init__(self, api_key: str):
-        self.client = googlemaps.Client(key=api_key)
+    def __init__(
+        self,
+        api_key: str,
+        details_concurrency: int = 5,
+        details_timeout: float = 2.5,
+        max_workers: int = 16,
+        details_workers: int = 16,
+        geocode_cache_size: int = 512,
+        geocode_cache_ttl: float = 86400.0,
+        details_cache_size: int = 1024,
+        details_cache_bytes: int = 4 * 1024 * 1024,
+        details_cache_ttl: float = 1800.0,
+        nearby_precision: int = 6,
+        nearby_cache_size: int = 2048,
+        nearby_cache_bytes: int = 8 * 1024 * 1024,
+        nearby_cache_ttl: float = 900.0,
+        transport: Optional[HTTPTransport] = None,
+        client: Optional[googlemaps.Client] = None
+    ):
+        self.client = client or googlemaps.Client(
+            key=api_key,
+            requests_session=transport.session if transport else None
+        )
+        self.executor = BlockingExecutor("maps", max_workers)
+
+        # Callers repeat the same few locations turn after turn
+        self.geocode_cache = TTLCache(maxsize=geocode_cache_size, ttl=geocode_cache_ttl)
+
+        # Shared by search and reservation lookups, so the reservation turn
+        # that follows a search reuses the details already fetched for it
+        self.details_cache = TTLCache(
+            maxsize=details_cache_size,
+            ttl=details_cache_ttl,
+            max_bytes=details_cache_bytes
+        )
+
+        # Nearby results by geohash tile and keyword: callers a few blocks
+        # apart share one search from the tile's center, re-ranked by
+        # distance to each caller. A precision of 0 turns this off.
+        self.nearby_precision = nearby_precision
+        self.nearby_cache = TTLCache(
+            maxsize=nearby_cache_size,
+            ttl=nearby_cache_ttl,
+            max_bytes=nearby_cache_bytes
+        ) if nearby_precision > 0 else None
+
+        # Identical searches, geocodes and details lookups already in flight
+        # (a popular venue, an event letting out) share one upstream call
+        self.flights = SingleFlight()
+
+        # Place details fan-out: each search runs up to `details_concurrency`
+        # lookups at once, and the whole batch gets `details_timeout`
+        # seconds. A concurrency of 1 keeps the old one-at-a-time behaviour.
+        # Lookups get their own pool, so background details for texts and
+        # prefetches never hold up the searches callers wait on.
+        self.details_concurrency = max(1, details_concurrency)
+        self.details_timeout = details_timeout
+        self.details_executor = BlockingExecutor("maps-details", details_workers)
+
+    def search_places(
+        self,
+        query: str,
+        location: str,
+        detail_fields: Sequence[str] = SMS_DETAILS,
+        detail_limit: int = 0
+    ) -> List[Dict]:
+        """Search for places near a location.
+
+        Details (`detail_fields`) are fetched for the first `detail_limit`
+        results only, none by default: name, address and rating come with
+        the search itself, which is all a spoken answer needs. Fetch the
+        rest later with fill_place_details when something reads them.
+        """
+        key = ("search", normalize_text(query), normalize_text(location), tuple(detail_fields), detail_limit)
+        places, _ = self.flights.do(key, self._search_places, query, location, detail_fields, detail_limit)
+        # Callers add details to their results, so none of them gets the shared records
+        return copy.deepcopy(places)
 
-    def search_places(self, query: str, location: str) -> List[Dict]:
-        """Search for places near a location"""
+    def _search_places(
+        self,
+        query: str,
+        location: str,
+        detail_fields: Sequence[str],
+        detail_limit: int
+    ) -> List[Dict]:
         try:
             # First, geocode the location
-            geocode_result = self.client.geocode(location)
+            geocode_result = self._geocode(location)
             if not geocode_result:
                 logger.error(f"Could not geocode location: {location}")
                 return []
 
-            lat_lng = geocode_result[0]['geometry']['location']
+            lat_lng = geocode_result['geometry']['location']
 
             # Search for places
-            results = self.client.places_nearby(
-                location=(lat_lng['lat'], lat_lng['lng']),
-                radius=5000,  # 5km radius
-                keyword=query,
-                rank_by='prominence'
-            )
+            results = self._nearby(query, lat_lng['lat'], lat_lng['lng'])
 
             places = []
-            for place in results.get('results', [])[:5]:  # Top 5
-                place_info = {
+            for place in results[:5]:  # Top 5
+                places.append({
                     'name': place.get('name'),
                     'address': place.get('vicinity'),
                     'rating': place.get('rating'),
                     'user_ratings_total': place.get('user_ratings_total', 0),
                     'place_id': place.get('place_id'),
                     'types': place.get('types', [])
-                }
+                })
 
-                # Get additional details
-                if place.get('place_id'):
-                    details = self._get_place_details(place['place_id'])
-                    place_info.update(details)
-
-                places.append(place_info)
+            # Get additional details
+            if detail_limit > 0:
+                self.fill_place_details(places, detail_fields, detail_limit)
 
             logger.info(f"Found {len(places)} places for query: {query}")
             return places
@@ -53,44 +152,197 @@ class MapsService:
             logger.error(f"Maps API error: {e}")
             return []
 
-    def _get_place_details(self, place_id: str) -> Dict:
-        """Get detailed information about a place"""
-        try:
-            result = self.client.place(
-                place_id=place_id,
-                fields=[
-                    'opening_hours',
-                    'formatted_phone_number',
-                    'website',
-                    'url',  # Google Maps URL
-                    'price_level',
-                    'serves_dinner',
-                    'serves_lunch',
-                    'reservable'
-                ]
+    def _nearby(self, query: str, lat: float, lng: float) -> List[Dict]:
+        """Nearby-search results for a point, from its tile when cached"""
+        if self.nearby_cache is None:
+            return self._places_nearby(query, lat, lng)
+
+        key = (geohash.encode(lat, lng, self.nearby_precision), normalize_text(query))
+        results = self.nearby_cache.get(key)
+        if results is None:
+            results, _ = self.flights.do(("nearby",) + key, self._fetch_tile, key, query)
+
+        def distance(place: Dict) -> float:
+            point = (place.get('geometry') or {}).get('location')
+            return geohash.distance_m(lat, lng, point['lat'], point['lng']) if point else float('inf')
+
+        return sorted(results, key=distance)
+
+    def _fetch_tile(self, key: tuple, query: str) -> List[Dict]:
+        tile_lat, tile_lng = geohash.decode(key[0])
+        results = [
+            {field: place[field] for field in NEARBY_FIELDS if field in place}
+            for place in self._places_nearby(query, tile_lat, tile_lng)
+        ]
+        self.nearby_cache.set(key, results)
+        return results
+
+    def _places_nearby(self, query: str, lat: float, lng: float) -> List[Dict]:
+        with span("maps.nearby", "maps"):
+            results = self.client.places_nearby(
+                location=(lat, lng),
+                radius=5000,  # 5km radius
+                keyword=query,
+                rank_by='prominence'
+            )
+        return results.get('results', [])
+
+    def _geocode(self, location: str) -> Optional[Dict]:
+        """Geocode a location string, served from the cache when possible"""
+        key = normalize_text(location)
+        cached = self.geocode_cache.get(key)
+        if cached is not None:
+            return cached
+
+        result, _ = self.flights.do(("geocode", key), self._fetch_geocode, key, location)
+        return result
+
+    def _fetch_geocode(self, key: str, location: str) -> Optional[Dict]:
+        with span("maps.geocode", "maps"):
+            result = self.client.geocode(location)
+        if not result:
+            return None
+
+        self.geocode_cache.set(key, result[0])
+        return result[0]
+
+    def cache_stats(self) -> Dict[str, Dict]:
+        """Hit/miss counters for the Maps caches, and calls saved by coalescing"""
+        return {
+            'geocode': self.geocode_cache.stats(),
+            'details': self.details_cache.stats(),
+            'nearby': self.nearby_cache.stats() if self.nearby_cache is not None else None,
+            'coalesced': self.flights.stats()
+        }
+
+    async def search_places_async(
+        self,
+        query: str,
+        location: str,
+        detail_fields: Sequence[str] = SMS_DETAILS,
+        detail_limit: int = 0
+    ) -> List[Dict]:
+        """Non-blocking search_places for use from request handlers"""
+        return await self.executor.run(self.search_places, query, location, detail_fields, detail_limit)
+
+    def fill_place_details(
+        self,
+        places: List[Dict],
+        fields: Sequence[str] = ALL_DETAILS,
+        limit: Optional[int] = None
+    ) -> None:
+        """Merge `fields` of place details into the first `limit` records, in place.
+
+        Lookups for one call run `details_concurrency` at a time on the
+        details executor (one after another at a concurrency of 1), and the
+        caller waits at most `details_timeout` for them. Records whose
+        lookup misses the deadline keep their nearby-search fields only, so
+        one slow Details request can't fail the whole search.
+        """
+        targets = [p for p in places[:limit] if p.get('place_id')]
+        if not targets:
+            return
+
+        deadline = time.monotonic() + self.details_timeout
+        lock = threading.Lock()
+        pending = list(range(len(targets)))
+        found: Dict[int, Dict] = {}
+
+        def drain():
+            while time.monotonic() < deadline:
+                with lock:
+                    if not pending:
+                        return
+                    i = pending.pop(0)
+                details = self._get_place_details(targets[i]['place_id'], fields)
+                with lock:
+                    found[i] = details
+
+        workers = [
+            self.details_executor.submit(drain)
+            for _ in range(min(self.details_concurrency, len(targets)))
+        ]
+        wait(workers, timeout=max(0.0, deadline - time.monotonic()))
+
+        # Lookups still running only ever write to `found`, which is no
+        # longer read; the records are only touched on this thread
+        with lock:
+            results = dict(found)
+            pending.clear()
+        for worker in workers:
+            worker.cancel()
+        for i, details in results.items():
+            targets[i].update(details)
+
+        missed = len(targets) - len(results)
+        if missed:
+            logger.warning(
+                f"{missed} place detail lookups missed the "
+                f"{self.details_timeout}s deadline, returning partial results"
             )
 
-            details = {}
+    async def fill_place_details_async(
+        self,
+        places: List[Dict],
+        fields: Sequence[str] = ALL_DETAILS,
+        limit: Optional[int] = None
+    ) -> None:
+        """Non-blocking fill_place_details for use from request handlers"""
+        await self.executor.run(self.fill_place_details, places, fields, limit)
+
+    def _get_place_details(self, place_id: str, fields: Sequence[str] = ALL_DETAILS) -> Dict:
+        """Get detailed information about a place.
+
+        The cache remembers which fields it holds for each place, so only
+        fields no earlier lookup asked for are requested from Google.
+        """
+        cached = self.details_cache.get(place_id)
+        have = set(cached['fields']) if cached is not None else set()
+        details = dict(cached['details']) if cached is not None else {}
+
+        missing = [field for field in fields if field not in have]
+        if not missing:
+            return details
+
+        try:
+            # Read-only: a concurrent lookup of the same fields may share it
+            result, _ = self.flights.do(("details", place_id, tuple(missing)), self._fetch_details, place_id, missing)
+
             if 'result' in result:
                 place_info = result['result']
-                details['phone'] = place_info.get('formatted_phone_number')
-                details['website'] = place_info.get('website')
-                details['maps_url'] = place_info.get('url')  # Direct Google Maps link
-                details['price_level'] = place_info.get('price_level')  # 0-4 scale
-                details['reservable'] = place_info.get('reservable', False)
-
-                if 'opening_hours' in place_info:
+                if 'phone' in missing:
+                    details['phone'] = place_info.get('formatted_phone_number')
+                if 'website' in missing:
+                    details['website'] = place_info.get('website')
+                    # Extract booking URL if it's a known platform
+                    if details['website']:
+                        details['booking_url'] = self._extract_booking_url(details['website'])
+                if 'maps_url' in missing:
+                    details['maps_url'] = place_info.get('url')  # Direct Google Maps link
+                if 'price_level' in missing:
+                    details['price_level'] = place_info.get('price_level')  # 0-4 scale
+                if 'reservable' in missing:
+                    details['reservable'] = place_info.get('reservable', False)
+                if 'open_now' in missing and 'opening_hours' in place_info:
                     details['open_now'] = place_info['opening_hours'].get('open_now')
 
-                # Extract booking URL if it's a known platform
-                if details.get('website'):
-                    details['booking_url'] = self._extract_booking_url(details['website'])
+                self.details_cache.set(place_id, {
+                    'fields': sorted(have.union(missing)),
+                    'details': details
+                })
 
-            return details
+            return dict(details)
 
         except Exception as e:
             logger.error(f"Error getting place details: {e}")
-            return {}
+            return details
+
+    def _fetch_details(self, place_id: str, missing: Sequence[str]) -> Dict:
+        with span("maps.details", "maps"):
+            return self.client.place(
+                place_id=place_id,
+                fields=[DETAIL_FIELDS[field] for field in missing]
+            )
 
     def _extract_booking_url(self, website: str) -> Optional[str]:
         """Extract booking URL if from known reservation platforms"""
@@ -115,7 +367,7 @@ class MapsService:
     def get_reservation_info(self, place_id: str) -> Dict:
         """Get reservation-specific information for a place"""
         try:
-            details = self._get_place_details(place_id)
+            details = self._get_place_details(place_id, RESERVATION_DETAILS)
 
             reservation_info = {
                 'place_id': place_id,
@@ -141,6 +393,53 @@ class MapsService:
             logger.error(f"Error getting reservation info: {e}")
             return {}
 
+    async def get_reservation_info_async(self, place_id: str) -> Dict:
+        """Non-blocking get_reservation_info for use from request handlers"""
+        return await self.executor.run(self.get_reservation_info, place_id)
+
+    def find_place(self, name: str, location: Optional[str] = None) -> Optional[Dict]:
+        """Look up a single place by name.
+
+        One Find Place request (plus a cached geocode to bias it towards
+        `location`) instead of the nearby search and details fan-out of
+        search_places.
+        """
+        try:
+            location_bias = None
+            if location:
+                geocode_result = self._geocode(location)
+                if geocode_result:
+                    lat_lng = geocode_result['geometry']['location']
+                    location_bias = f"circle:5000@{lat_lng['lat']},{lat_lng['lng']}"
+
+            with span("maps.find_place", "maps"):
+                result = self.client.find_place(
+                    input=name,
+                    input_type='textquery',
+                    fields=['place_id', 'name', 'formatted_address', 'rating', 'user_ratings_total'],
+                    location_bias=location_bias
+                )
+            candidates = result.get('candidates', [])
+            if not candidates:
+                return None
+
+            place = candidates[0]
+            return {
+                'name': place.get('name'),
+                'address': place.get('formatted_address'),
+                'rating': place.get('rating'),
+                'user_ratings_total': place.get('user_ratings_total', 0),
+                'place_id': place.get('place_id')
+            }
+
+        except Exception as e:
+            logger.error(f"Find Place error: {e}")
+            return None
+
+    async def find_place_async(self, name: str, location: Optional[str] = None) -> Optional[Dict]:
+        """Non-blocking find_place for use from request handlers"""
+        return await self.executor.run(self.find_place, name, location)
+
     def _identify_platform(self, url: str) -> str:
         """Identify the booking platform from URL"""
         url_lower = url.lower()
@@ -161,14 +460,18 @@ class MapsService:
     def geocode_address(self, address: str) -> Optional[Dict]:
         """Convert address to coordinates"""
         try:
-            result = self.client.geocode(address)
+            result = self._geocode(address)
             if result:
-                location = result[0]['geometry']['location']
+                location = result['geometry']['location']
                 return {
                     'lat': location['lat'],
                     'lng': location['lng'],
-                    'formatted_address': result[0]['formatted_address']
+                    'formatted_address': result['formatted_address']
                 }
         except Exception as e:
             logger.error(f"Geocoding error: {e}")
         return None
+
+    async def geocode_address_async(self, address: str) -> Optional[Dict]:
+        """Non-blocking geocode_address for use from request handlers"""
+        return await self.executor.run(self.geocode_address, address)
@@ -0,0 +1,107 @@
+# services/place_resolver.py
+import copy
+import logging
+import re
+from difflib import SequenceMatcher
+from typing import Dict, List, Optional
+
+from utils.cache import normalize_text
+
+logger = logging.getLogger(__name__)
+
+# Words that don't tell two places apart
+_GENERIC = frozenset("the a an restaurant restaurants cafe bar place at on in of and".split())
+
+_ORDINALS = {
+    'first': 0, '1st': 0, 'top': 0, 'second': 1, '2nd': 1, 'third': 2, '3rd': 2,
+    'fourth': 3, '4th': 3, 'fifth': 4, '5th': 4, 'last': -1
+}
+_ORDINAL = re.compile(r"^(?:the\s+)?(\w+)(?:\s+(?:one|place|result|option))?$")
+
+def _name_tokens(name: str) -> List[str]:
+    return [token for token in normalize_text(name).split() if token not in _GENERIC]
+
+class PlaceResolver:
+    """Resolve a spoken place name against places the call already heard about.
+
+    Each session keeps the places returned by its recent searches
+    (`recent_places`, newest first, at most `max_places`) and the order of
+    the latest results (`last_results`), so "Kazu", "kazu montreal" or
+    "the second one" become a known place without another Maps search.
+    """
+
+    def __init__(self, max_places: int = 15, min_score: float = 0.75):
+        self.max_places = max_places
+        self.min_score = min_score
+        self.hits = 0
+        self.misses = 0
+
+    def remember(self, session: Dict, places: List[Dict]):
+        """Add copies of a search's results to the session's recent places.
+
+        Copies, because the caller's records get details filled in on
+        worker threads while the session is being saved.
+        """
+        known = [copy.deepcopy(p) for p in places if p.get('place_id') and p.get('name')]
+        if not known:
+            return
+        ids = {p['place_id'] for p in known}
+        older = [p for p in session.get('recent_places', []) if p['place_id'] not in ids]
+        session['recent_places'] = (known + older)[:self.max_places]
+        session['last_results'] = [p['place_id'] for p in known]
+
+    def last_results(self, session: Dict) -> List[Dict]:
+        """The latest search's places, in the order they were read out"""
+        by_id = {p['place_id']: p for p in session.get('recent_places', [])}
+        return [by_id[place_id] for place_id in session.get('last_results', []) if place_id in by_id]
+
+    def resolve(self, session: Dict, place_name: str) -> Optional[Dict]:
+        """The recent place `place_name` refers to, or None"""
+        recent = session.get('recent_places', [])
+        place = self._by_ordinal(session, place_name, recent) or self._by_name(place_name, recent)
+        if place is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        logger.info(f"Resolved '{place_name}' to {place['name']} from earlier results")
+        return place
+
+    def _by_ordinal(self, session: Dict, place_name: str, recent: List[Dict]) -> Optional[Dict]:
+        match = _ORDINAL.match(normalize_text(place_name))
+        if not match or match.group(1) not in _ORDINALS:
+            return None
+        last_results = session.get('last_results', [])
+        index = _ORDINALS[match.group(1)]
+        if not last_results or index >= len(last_results):
+            return None
+        place_id = last_results[index]
+        return next((p for p in recent if p['place_id'] == place_id), None)
+
+    def _by_name(self, place_name: str, recent: List[Dict]) -> Optional[Dict]:
+        wanted = _name_tokens(place_name)
+        if not wanted:
+            return None
+        wanted_text = " ".join(wanted)
+
+        best, best_score = None, self.min_score
+        for place in recent:
+            tokens = _name_tokens(place['name'])
+            if not tokens:
+                continue
+            # "Kazu" for "Kazu Montreal": every spoken word is in the name
+            if set(wanted) <= set(tokens):
+                score = 1.0
+            else:
+                score = SequenceMatcher(None, wanted_text, " ".join(tokens)).ratio()
+            if score > best_score or (best is None and score == best_score):
+                best, best_score = place, score
+        return best
+
+    def stats(self) -> Dict:
+        """How often reservation turns were resolved without a Maps lookup"""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': round(self.hits / lookups, 3) if lookups else 0.0
+        }
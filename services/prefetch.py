@@ -0,0 +1,142 @@
+# services/prefetch.py
+import asyncio
+import copy
+import logging
+import uuid
+from typing import Dict, List, Optional
+
+from services.maps_service import SMS_DETAILS
+from utils.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+class SearchPrefetcher:
+    """Warm the likely follow-ups of a search while the caller hears the answer.
+
+    After a search the next turn is usually "text me the list" or "book the
+    top one". `start` records the results on the session and, in the
+    background, fetches reservation info for the top result and the phone
+    numbers the SMS lists for the next two, then builds the SMS text. The
+    session's `prefetch` entry carries a token; a newer search replaces it
+    and cancels the old task, and results for a stale token are dropped.
+
+    The task works on its own copy of the places and, when done, merges its
+    results into the call's stored session through `store`, so the session
+    the webhook is saving is never changed from another thread.
+    """
+
+    def __init__(
+        self,
+        maps_service,
+        sms_service,
+        store=None,
+        max_sessions: int = 10000,
+        session_ttl: float = 1800.0
+    ):
+        self.maps_service = maps_service
+        self.sms_service = sms_service
+        self.store = store
+        # Kept after they finish: other session stores hand out copies that
+        # never see the result, so the next turn reads it from the task
+        self._tasks = TTLCache(maxsize=max_sessions, ttl=session_ttl)
+        self.hits = {'sms': 0, 'reservation': 0}
+
+    def start(self, call_sid: str, session: Dict, query: str, location: str, places: List[Dict]):
+        """Record a search on the session and start warming its follow-ups"""
+        self.cancel(call_sid)
+        token = uuid.uuid4().hex
+        session['prefetch'] = {
+            'token': token,
+            'query': query,
+            'location': location,
+            'places': copy.deepcopy(places),
+            'sms': None,
+            'reservation': None
+        }
+        if places and places[0].get('place_id'):
+            task = asyncio.create_task(self._warm(call_sid, token, copy.deepcopy(places)))
+            self._tasks.set(call_sid, task)
+
+    async def _warm(self, call_sid: str, token: str, places: List[Dict]) -> Dict:
+        top = places[0]
+        # The reservation lookup also brings the top result's phone number
+        reservation, _ = await asyncio.gather(
+            self.maps_service.get_reservation_info_async(top['place_id']),
+            self.maps_service.fill_place_details_async(places[1:], SMS_DETAILS, 2)
+        )
+        if reservation.get('phone'):
+            top['phone'] = reservation['phone']
+        warmed = {
+            'places': places,
+            'reservation': reservation,
+            'sms': self.sms_service.format_places_sms(places)
+        }
+        await self._save(call_sid, token, warmed)
+        return warmed
+
+    async def _save(self, call_sid: str, token: str, warmed: Dict):
+        """Merge warmed results into the stored session, unless a newer search replaced them"""
+        if self.store is None:
+            return
+        try:
+            session = await self.store.get_async(call_sid)
+            prefetch = session.get('prefetch') if session else None
+            if prefetch is None or prefetch['token'] != token:
+                return
+            prefetch.update(copy.deepcopy(warmed))
+            await self.store.save_async(call_sid, session)
+        except Exception as e:
+            logger.error(f"Could not save search prefetch: {e}")
+
+    def cancel(self, call_sid: str):
+        """Stop warming follow-ups for a call (new search, or the call ended)"""
+        task = self._tasks.pop(call_sid, None)
+        if task is not None and not task.done():
+            task.cancel()
+
+    async def sms_text(self, call_sid: str, session: Dict) -> Optional[str]:
+        """The SMS for the last search, waiting for it if still being built"""
+        prefetch = session.get('prefetch')
+        if not prefetch or not prefetch.get('places'):
+            return None
+        if prefetch.get('sms') is None:
+            warmed = await self._wait(call_sid)
+            if warmed is None:
+                return None
+            prefetch.update(copy.deepcopy(warmed))
+        self.hits['sms'] += 1
+        return prefetch['sms']
+
+    async def reservation(self, call_sid: str, session: Dict, place_id: str) -> Optional[Dict]:
+        """Prefetched reservation info for `place_id`, waiting for it if still in flight"""
+        prefetch = session.get('prefetch')
+        if not prefetch or not prefetch['places'] or prefetch['places'][0].get('place_id') != place_id:
+            return None
+        if prefetch.get('reservation') is not None:
+            self.hits['reservation'] += 1
+            return prefetch['reservation']
+
+        warmed = await self._wait(call_sid)
+        if warmed is None:
+            return None
+        self.hits['reservation'] += 1
+        return warmed['reservation']
+
+    async def _wait(self, call_sid: str) -> Optional[Dict]:
+        task = self._tasks.get(call_sid)
+        if task is None:
+            return None
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if task.cancelled():
+                return None  # Superseded by a newer search
+            raise
+        except Exception as e:
+            logger.error(f"Search prefetch failed: {e}")
+            return None
+
+    def stats(self) -> Dict:
+        """Follow-ups served from prefetched data"""
+        in_flight = sum(1 for _, task in self._tasks.items() if not task.done())
+        return {'in_flight': in_flight, 'hits': dict(self.hits)}
@@ -0,0 +1,263 @@
+# services/session_store.py
+import json
+import logging
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from services.executor import BlockingExecutor
+
+logger = logging.getLogger(__name__)
+
+class SessionStore(ABC):
+    """Where call sessions live between webhook requests.
+
+    Sessions are plain JSON-compatible dicts keyed by CallSid. Callers must
+    `save` a session after changing it; only the in-process store hands
+    out live objects, the shared backends return copies.
+
+    Request handlers use the `*_async` methods. Backends that do disk or
+    network I/O set `executor`, and those calls run on its pool instead of
+    the event loop.
+    """
+
+    executor: Optional[BlockingExecutor] = None
+
+    @abstractmethod
+    def get(self, call_sid: str) -> Optional[Dict]:
+        """The session for a call, or None if there is none or it expired"""
+
+    @abstractmethod
+    def save(self, call_sid: str, session: Dict):
+        """Store a session, replacing the call's previous one"""
+
+    @abstractmethod
+    def delete(self, call_sid: str):
+        """Forget a call's session"""
+
+    @abstractmethod
+    def __len__(self) -> int:
+        """Number of live sessions"""
+
+    async def _run(self, func, *args):
+        if self.executor is None:
+            return func(*args)
+        return await self.executor.run(func, *args)
+
+    async def get_async(self, call_sid: str) -> Optional[Dict]:
+        """Non-blocking get for use from request handlers"""
+        return await self._run(self.get, call_sid)
+
+    async def save_async(self, call_sid: str, session: Dict):
+        """Non-blocking save for use from request handlers"""
+        await self._run(self.save, call_sid, session)
+
+    async def delete_async(self, call_sid: str):
+        """Non-blocking delete for use from request handlers"""
+        await self._run(self.delete, call_sid)
+
+    async def count_async(self) -> int:
+        """Non-blocking len() for use from request handlers"""
+        return await self._run(len, self)
+
+    def close(self):
+        """Release resources on shutdown"""
+        if self.executor is not None:
+            self.executor.shutdown()
+
+class MemorySessionStore(SessionStore):
+    """Per-process store with idle expiry and a cap on live sessions"""
+
+    def __init__(self, ttl: float = 1800.0, max_size: int = 10000):
+        self.ttl = ttl
+        self.max_size = max(1, max_size)
+        self._sessions: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def get(self, call_sid: str) -> Optional[Dict]:
+        entry = self._sessions.get(call_sid)
+        if entry is None:
+            return None
+        last_seen, session = entry
+        if time.monotonic() - last_seen > self.ttl:
+            del self._sessions[call_sid]
+            return None
+        self._sessions[call_sid] = (time.monotonic(), session)
+        self._sessions.move_to_end(call_sid)
+        return session
+
+    def save(self, call_sid: str, session: Dict):
+        self._sessions[call_sid] = (time.monotonic(), session)
+        self._sessions.move_to_end(call_sid)
+        self._evict()
+
+    def delete(self, call_sid: str):
+        self._sessions.pop(call_sid, None)
+
+    def _evict(self):
+        # Oldest entries are at the front: drop idle ones, then enforce the cap
+        cutoff = time.monotonic() - self.ttl
+        while self._sessions:
+            call_sid, (last_seen, _) = next(iter(self._sessions.items()))
+            if last_seen >= cutoff and len(self._sessions) <= self.max_size:
+                break
+            del self._sessions[call_sid]
+
+    def __len__(self) -> int:
+        self._evict()
+        return len(self._sessions)
+
+    def close(self):
+        super().close()
+        self._sessions.clear()
+
+class SQLiteSessionStore(SessionStore):
+    """File-backed store that every worker on the host can share"""
+
+    PURGE_EVERY = 100
+
+    def __init__(self, path: str = "sessions.db", ttl: float = 1800.0, max_workers: int = 4):
+        self.ttl = ttl
+        self.executor = BlockingExecutor("sessions", max_workers)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS call_sessions ("
+            "call_sid TEXT PRIMARY KEY, data TEXT NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._writes = 0
+
+    def get(self, call_sid: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM call_sessions WHERE call_sid = ? AND updated_at > ?",
+                (call_sid, time.time() - self.ttl)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def save(self, call_sid: str, session: Dict):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO call_sessions (call_sid, data, updated_at) VALUES (?, ?, ?)",
+                (call_sid, json.dumps(session), time.time())
+            )
+            self._writes += 1
+            if self._writes % self.PURGE_EVERY == 0:
+                self._conn.execute(
+                    "DELETE FROM call_sessions WHERE updated_at <= ?",
+                    (time.time() - self.ttl,)
+                )
+
+    def delete(self, call_sid: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM call_sessions WHERE call_sid = ?", (call_sid,))
+
+    def __len__(self) -> int:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT COUNT(*) FROM call_sessions WHERE updated_at > ?",
+                (time.time() - self.ttl,)
+            ).fetchone()
+        return row[0]
+
+    def close(self):
+        super().close()
+        with self._lock:
+            self._conn.close()
+
+class RedisSessionStore(SessionStore):
+    """Store for running several workers or hosts behind a load balancer.
+
+    `client` only needs redis-py's get/set/delete/scan_iter, so
+    `LocalRedis` can stand in for a real server in development and tests.
+    """
+
+    def __init__(self, client, ttl: float = 1800.0, prefix: str = "call2map:session:", max_workers: int = 16):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+        self.executor = BlockingExecutor("sessions", max_workers)
+
+    def get(self, call_sid: str) -> Optional[Dict]:
+        data = self.client.get(self.prefix + call_sid)
+        return json.loads(data) if data else None
+
+    def save(self, call_sid: str, session: Dict):
+        self.client.set(self.prefix + call_sid, json.dumps(session), ex=max(1, int(self.ttl)))
+
+    def delete(self, call_sid: str):
+        self.client.delete(self.prefix + call_sid)
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self.client.scan_iter(match=self.prefix + "*"))
+
+    def close(self):
+        super().close()
+        self.client.close()
+
+class LocalRedis:
+    """In-process stand-in for the subset of redis-py used by RedisSessionStore"""
+
+    def __init__(self):
+        self._data: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> Optional[str]:
+        with self._lock:
+            entry = self._data.get(name)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[name]
+                return None
+            return value
+
+    def set(self, name: str, value: str, ex: Optional[int] = None) -> bool:
+        expires_at = time.monotonic() + ex if ex else None
+        with self._lock:
+            self._data[name] = (value, expires_at)
+        return True
+
+    def delete(self, *names: str) -> int:
+        with self._lock:
+            return sum(1 for name in names if self._data.pop(name, None) is not None)
+
+    def scan_iter(self, match: str = "*"):
+        prefix = match.rstrip("*")
+        for name in list(self._data):
+            if name.startswith(prefix) and self.get(name) is not None:
+                yield name
+
+    def close(self):
+        pass
+
+def create_session_store(settings) -> SessionStore:
+    """Build the session store selected by `settings.session_backend`"""
+    backend = settings.session_backend.lower()
+
+    if backend == "memory":
+        return MemorySessionStore(ttl=settings.session_ttl, max_size=settings.session_max_size)
+
+    if backend == "sqlite":
+        return SQLiteSessionStore(
+            settings.session_sqlite_path,
+            ttl=settings.session_ttl,
+            max_workers=settings.session_workers
+        )
+
+    if backend == "redis":
+        if settings.session_redis_url == "local":
+            client = LocalRedis()
+        else:
+            try:
+                import redis
+            except ImportError:
+                raise RuntimeError("SESSION_BACKEND=redis requires: pip install redis")
+            client = redis.Redis.from_url(settings.session_redis_url, decode_responses=True)
+        return RedisSessionStore(client, ttl=settings.session_ttl, max_workers=settings.session_workers)
+
+    raise ValueError(f"Unknown session backend: {settings.session_backend}")
@@ -0,0 +1,255 @@
+# services/sms_dispatcher.py
+import asyncio
+import hashlib
+import logging
+import random
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set
+
+from twilio.base.exceptions import TwilioRestException
+
+from utils.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class OutboundSMS:
+    to_number: str
+    body: str
+    attempts: int = 0
+    spool_id: Optional[int] = None
+
+class SMSSpool:
+    """SQLite file holding texts until Twilio has accepted them.
+
+    Anything still here when the server stops is sent after the next start.
+    The dispatcher calls it through the SMSService executor, never from the
+    event loop.
+    """
+
+    def __init__(self, path: str = "sms_spool.db"):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sms_spool ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, to_number TEXT NOT NULL, body TEXT NOT NULL, "
+            "attempts INTEGER NOT NULL DEFAULT 0, created_at REAL NOT NULL)"
+        )
+
+    def add(self, sms: OutboundSMS) -> int:
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO sms_spool (to_number, body, attempts, created_at) VALUES (?, ?, ?, ?)",
+                (sms.to_number, sms.body, sms.attempts, time.time())
+            )
+        return cursor.lastrowid
+
+    def update_attempts(self, spool_id: int, attempts: int):
+        with self._lock:
+            self._conn.execute("UPDATE sms_spool SET attempts = ? WHERE id = ?", (attempts, spool_id))
+
+    def remove(self, spool_id: int):
+        with self._lock:
+            self._conn.execute("DELETE FROM sms_spool WHERE id = ?", (spool_id,))
+
+    def pending(self) -> List[OutboundSMS]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, to_number, body, attempts FROM sms_spool ORDER BY id"
+            ).fetchall()
+        return [OutboundSMS(to_number, body, attempts, spool_id) for spool_id, to_number, body, attempts in rows]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+class SMSDispatcher:
+    """Send texts from background tasks so a call never waits on Twilio Messaging.
+
+    `send` only queues the message. Worker tasks deliver it through the
+    SMSService thread pool, retrying transient failures with exponential
+    backoff and jitter. Each destination gets a token bucket of
+    `rate_burst` texts refilled at `rate_per_minute`. The same body sent
+    to the same number within `dedupe_window` seconds goes out once.
+    """
+
+    def __init__(
+        self,
+        sms_service,
+        workers: int = 4,
+        queue_size: int = 1000,
+        max_attempts: int = 5,
+        retry_base: float = 1.0,
+        retry_max: float = 60.0,
+        rate_per_minute: float = 6.0,
+        rate_burst: int = 3,
+        dedupe_window: float = 300.0,
+        spool: Optional[SMSSpool] = None
+    ):
+        self.sms_service = sms_service
+        self.workers = max(1, workers)
+        self.max_attempts = max(1, max_attempts)
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self.rate_per_second = rate_per_minute / 60.0
+        self.rate_burst = max(1, rate_burst)
+        self.spool = spool
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, queue_size))
+        self._recent = TTLCache(maxsize=10000, ttl=dedupe_window)
+        self._buckets: Dict[str, tuple] = {}
+        self._tasks: Set[asyncio.Task] = set()
+        # Texts accepted by send() and not yet sent or given up on
+        self.outstanding = 0
+        self.counts = {
+            'queued': 0, 'sent': 0, 'failed': 0, 'retried': 0,
+            'deduped': 0, 'rate_limited': 0, 'dropped': 0
+        }
+
+    async def start(self):
+        """Start the workers and queue whatever the spool kept from last time"""
+        for i in range(self.workers):
+            self._spawn(self._worker(), name=f"sms-dispatch-{i}")
+        if self.spool is not None:
+            for sms in await self._spooled(self.spool.pending):
+                self.outstanding += 1
+                self._enqueue(sms)
+
+    async def _spooled(self, func, *args):
+        """Run a spool operation on the SMSService pool; SQLite blocks"""
+        return await self.sms_service.executor.run(func, *args)
+
+    async def send(self, to_number: str, body: str) -> bool:
+        """Queue a text; False if it was dropped because the queue is full"""
+        key = (to_number, hashlib.sha1(body.encode('utf-8')).hexdigest())
+        if key in self._recent:
+            self.counts['deduped'] += 1
+            logger.info(f"Skipping duplicate SMS to {to_number}")
+            return True
+        # Claimed before spooling, so a duplicate sent meanwhile is skipped
+        self._recent.set(key, True)
+
+        sms = OutboundSMS(to_number, body)
+        try:
+            if self.spool is not None:
+                sms.spool_id = await self._spooled(self.spool.add, sms)
+        except Exception:
+            self._recent.pop(key)
+            raise
+        self.outstanding += 1
+        if not self._enqueue(sms):
+            # Not sent, so the same text may be tried again
+            self._recent.pop(key)
+            return False
+        self.counts['queued'] += 1
+        return True
+
+    def _enqueue(self, sms: OutboundSMS) -> bool:
+        try:
+            self._queue.put_nowait(sms)
+        except asyncio.QueueFull:
+            self.counts['dropped'] += 1
+            self.outstanding -= 1
+            kept = " (kept in spool)" if sms.spool_id is not None else ""
+            logger.error(f"SMS queue full, not sending to {sms.to_number}{kept}")
+            return False
+        return True
+
+    def _spawn(self, coro, name: Optional[str] = None):
+        task = asyncio.create_task(coro, name=name)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def _later(self, sms: OutboundSMS, delay: float):
+        async def requeue():
+            await asyncio.sleep(delay)
+            self._enqueue(sms)
+        self._spawn(requeue())
+
+    def _take_token(self, to_number: str) -> float:
+        """Spend one of the destination's tokens; return how long to wait if none"""
+        now = time.monotonic()
+        tokens, updated = self._buckets.get(to_number, (float(self.rate_burst), now))
+        tokens = min(float(self.rate_burst), tokens + (now - updated) * self.rate_per_second)
+        if tokens < 1.0:
+            self._buckets[to_number] = (tokens, now)
+            return (1.0 - tokens) / self.rate_per_second if self.rate_per_second > 0 else self.retry_max
+        self._buckets[to_number] = (tokens - 1.0, now)
+        if len(self._buckets) > 10000:
+            self._buckets.clear()  # Only rate state is lost
+        return 0.0
+
+    async def _worker(self):
+        while True:
+            sms = await self._queue.get()
+            try:
+                wait = self._take_token(sms.to_number)
+                if wait > 0:
+                    self.counts['rate_limited'] += 1
+                    self._later(sms, wait)
+                    continue
+                await self._deliver(sms)
+            except Exception as e:
+                logger.error(f"SMS dispatcher error: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def _deliver(self, sms: OutboundSMS):
+        sms.attempts += 1
+        try:
+            await self.sms_service.executor.run(self.sms_service.create_message, sms.to_number, sms.body)
+        except Exception as e:
+            # 4xx other than 429 (bad number, opted out...) will never succeed
+            permanent = isinstance(e, TwilioRestException) and 400 <= e.status < 500 and e.status != 429
+            if permanent or sms.attempts >= self.max_attempts:
+                self.counts['failed'] += 1
+                logger.error(f"Giving up on SMS to {sms.to_number} after {sms.attempts} attempt(s): {e}")
+                await self._forget(sms)
+                return
+
+            delay = min(self.retry_max, self.retry_base * 2 ** (sms.attempts - 1))
+            delay *= random.uniform(0.5, 1.0)
+            self.counts['retried'] += 1
+            logger.warning(f"SMS to {sms.to_number} failed ({e}), retrying in {delay:.1f}s")
+            if sms.spool_id is not None:
+                await self._spooled(self.spool.update_attempts, sms.spool_id, sms.attempts)
+            self._later(sms, delay)
+            return
+
+        self.counts['sent'] += 1
+        await self._forget(sms)
+
+    async def _forget(self, sms: OutboundSMS):
+        try:
+            if sms.spool_id is not None:
+                await self._spooled(self.spool.remove, sms.spool_id)
+        finally:
+            self.outstanding -= 1
+
+    async def join(self, poll: float = 0.01):
+        """Wait until every queued text was sent or given up on, retries included"""
+        while self.outstanding:
+            await asyncio.sleep(poll)
+
+    async def stop(self, drain_timeout: float = 5.0):
+        """Give queued texts a moment to go out, then cancel the workers.
+
+        Texts still unsent are lost unless spooled; spooled ones are sent
+        after the next start.
+        """
+        try:
+            await asyncio.wait_for(self._queue.join(), drain_timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Stopping with {self._queue.qsize()} SMS still queued")
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self.spool is not None:
+            self.spool.close()
+
+    def stats(self) -> Dict:
+        """Delivery counters and current queue depth"""
+        return {**self.counts, 'queue_depth': self._queue.qsize(), 'outstanding': self.outstanding}
@@ -1,33 +1,74 @@
 # services/sms_service.py
+from twilio.http.http_client import TwilioHttpClient
 from twilio.rest import Client
 import logging
+from typing import Optional
 from config import get_settings
+from services.executor import BlockingExecutor
+from services.http_transport import HTTPTransport
+from utils.tracing import span
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
 class SMSService:
-    def __init__(self):
-        self.client = Client(
+    def __init__(
+        self,
+        client: Optional[Client] = None,
+        max_workers: Optional[int] = None,
+        transport: Optional[HTTPTransport] = None
+    ):
+        http_client = None
+        if transport is not None:
+            # Reuse the shared keep-alive pool instead of Twilio's own session
+            http_client = TwilioHttpClient()
+            http_client.session = transport.session
+        self.client = client or Client(
             settings.twilio_account_sid,
-            settings.twilio_auth_token
+            settings.twilio_auth_token,
+            http_client=http_client
         )
         self.from_number = settings.twilio_phone_number
+        self.executor = BlockingExecutor("twilio", max_workers or settings.sms_workers)
     
-    def send_sms(self, to_number: str, message: str) -> bool:
-        """Send SMS to a phone number"""
-        try:
+    def create_message(self, to_number: str, message: str) -> str:
+        """Send SMS to a phone number, raising on failure; returns the message SID"""
+        with span("twilio.sms", "twilio"):
             msg = self.client.messages.create(
                 body=message,
                 from_=self.from_number,
                 to=to_number
             )
-            logger.info(f"SMS sent to {to_number}, SID: {msg.sid}")
+        logger.info(f"SMS sent to {to_number}, SID: {msg.sid}")
+        return msg.sid
+
+    def send_sms(self, to_number: str, message: str) -> bool:
+        """Send SMS to a phone number"""
+        try:
+            self.create_message(to_number, message)
             return True
         except Exception as e:
             logger.error(f"Error sending SMS: {e}")
             return False
     
+    async def send_sms_async(self, to_number: str, message: str) -> bool:
+        """Non-blocking send_sms for use from request handlers"""
+        return await self.executor.run(self.send_sms, to_number, message)
+    
+    def update_call(self, call_sid: str, twiml: str) -> bool:
+        """Replace the TwiML a live call is executing"""
+        try:
+            with span("twilio.update_call", "twilio"):
+                self.client.calls(call_sid).update(twiml=twiml)
+            return True
+        except Exception as e:
+            logger.error(f"Error updating call {call_sid}: {e}")
+            return False
+    
+    async def update_call_async(self, call_sid: str, twiml: str) -> bool:
+        """Non-blocking update_call for use from request handlers"""
+        return await self.executor.run(self.update_call, call_sid, twiml)
+    
     def format_places_sms(self, places: list) -> str:
         """Format places into SMS-friendly text"""
         if not places:
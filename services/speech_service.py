@@ -0,0 +1,218 @@
+# services/speech_service.py
+import asyncio
+import json
+import logging
+from abc import ABC, abstractmethod
+from typing import Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+class StreamingSTT(ABC):
+    """Streaming speech-to-text session for one call.
+
+    The media stream feeds decoded 16-bit PCM as it arrives. Turn-taking is
+    decided on our side: when the caller stops talking the server calls
+    `end_utterance` and gets back whatever was said since the last one.
+    """
+
+    sample_rate = 8000
+
+    async def start(self):
+        """Open the recognizer connection"""
+
+    @abstractmethod
+    async def feed(self, pcm: bytes):
+        """Send the next chunk of 16-bit little-endian mono PCM"""
+
+    @abstractmethod
+    async def end_utterance(self) -> str:
+        """Return the transcript of the utterance that just ended"""
+
+    async def close(self):
+        """Release the recognizer connection"""
+
+class FileReplaySTT(StreamingSTT):
+    """Local stand-in that replays transcripts from a file.
+
+    Each line of the file (or the "text" field of each JSON line) is
+    returned for one utterance, in order, so the streaming path can be
+    exercised end to end without a speech provider.
+    """
+
+    def __init__(self, path: str):
+        with open(path, encoding='utf-8') as f:
+            lines = [line.strip() for line in f if line.strip()]
+        self._utterances: List[str] = [
+            json.loads(line).get('text', '') if line.startswith('{') else line
+            for line in lines
+        ]
+        self._heard_audio = False
+
+    async def feed(self, pcm: bytes):
+        self._heard_audio = True
+
+    async def end_utterance(self) -> str:
+        if not self._heard_audio or not self._utterances:
+            return ""
+        self._heard_audio = False
+        return self._utterances.pop(0)
+
+class DeepgramSTT(StreamingSTT):
+    """Deepgram live transcription over a websocket.
+
+    Deepgram's own endpointing is turned off; `end_utterance` sends a
+    Finalize message and waits for the transcript it flushes. The socket
+    lives as long as the call, across media stream reconnects, so a
+    KeepAlive goes out while no audio is being sent.
+    """
+
+    URL = (
+        "wss://api.deepgram.com/v1/listen?encoding=linear16&sample_rate=8000"
+        "&channels=1&punctuate=true&endpointing=false"
+    )
+
+    def __init__(self, api_key: str, finalize_timeout: float = 1.5, keepalive_interval: float = 5.0):
+        self.api_key = api_key
+        self.finalize_timeout = finalize_timeout
+        self.keepalive_interval = keepalive_interval
+        self._ws = None
+        self._reader: Optional[asyncio.Task] = None
+        self._keepalive: Optional[asyncio.Task] = None
+        self._last_sent = 0.0
+        self._finals: List[str] = []
+        self._finalized = asyncio.Event()
+
+    async def start(self):
+        import websockets
+
+        self._ws = await websockets.connect(
+            self.URL,
+            additional_headers={"Authorization": f"Token {self.api_key}"}
+        )
+        self._reader = asyncio.create_task(self._read_results())
+        self._keepalive = asyncio.create_task(self._keep_alive())
+
+    async def _keep_alive(self):
+        """Deepgram closes sockets that go 10s without data, e.g. during a <Say>"""
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                await asyncio.sleep(self.keepalive_interval)
+                if loop.time() - self._last_sent >= self.keepalive_interval:
+                    await self._ws.send(json.dumps({"type": "KeepAlive"}))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Deepgram keep-alive stopped: {e}")
+
+    async def _read_results(self):
+        try:
+            async for message in self._ws:
+                data = json.loads(message)
+                if data.get('type') != 'Results' or not data.get('is_final'):
+                    continue
+                transcript = data['channel']['alternatives'][0].get('transcript', '')
+                if transcript:
+                    self._finals.append(transcript)
+                if data.get('from_finalize'):
+                    self._finalized.set()
+        except Exception as e:
+            logger.error(f"Deepgram connection error: {e}")
+        finally:
+            self._finalized.set()
+
+    async def feed(self, pcm: bytes):
+        if self._ws is not None:
+            self._last_sent = asyncio.get_running_loop().time()
+            await self._ws.send(bytes(pcm))
+
+    async def end_utterance(self) -> str:
+        if self._ws is None:
+            return ""
+        self._finalized.clear()
+        await self._ws.send(json.dumps({"type": "Finalize"}))
+        try:
+            await asyncio.wait_for(self._finalized.wait(), self.finalize_timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Deepgram finalize timed out, using partial transcript")
+
+        transcript = " ".join(self._finals)
+        self._finals.clear()
+        return transcript
+
+    async def close(self):
+        if self._keepalive is not None:
+            self._keepalive.cancel()
+        if self._ws is not None:
+            try:
+                await self._ws.send(json.dumps({"type": "CloseStream"}))
+            except Exception:
+                pass
+            await self._ws.close()
+        if self._reader is not None:
+            self._reader.cancel()
+
+class SpeechSynthesizer(ABC):
+    """Text-to-speech for replies played over the media stream"""
+
+    @abstractmethod
+    async def synthesize(self, text: str) -> bytes:
+        """Return 8 kHz μ-law audio, ready to send to Twilio"""
+
+    async def close(self):
+        """Release HTTP resources"""
+
+class DeepgramTTS(SpeechSynthesizer):
+    """Deepgram Aura text-to-speech, requested directly in Twilio's format"""
+
+    URL = "https://api.deepgram.com/v1/speak"
+
+    def __init__(self, api_key: str, voice: str = "aura-asteria-en"):
+        self.api_key = api_key
+        self.voice = voice
+        self._session = None
+
+    async def synthesize(self, text: str) -> bytes:
+        import aiohttp
+
+        if self._session is None:
+            self._session = aiohttp.ClientSession()
+        async with self._session.post(
+            self.URL,
+            params={"model": self.voice, "encoding": "mulaw", "sample_rate": "8000", "container": "none"},
+            headers={"Authorization": f"Token {self.api_key}"},
+            json={"text": text}
+        ) as response:
+            response.raise_for_status()
+            return await response.read()
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+
+def create_tts(settings) -> Optional[SpeechSynthesizer]:
+    """Build the synthesizer selected by `settings.tts_provider`, if any"""
+    provider = settings.tts_provider.lower()
+    if not provider:
+        return None  # Replies are spoken with Twilio <Say>
+    if provider == "deepgram":
+        if not settings.deepgram_api_key:
+            raise ValueError("TTS_PROVIDER=deepgram requires DEEPGRAM_API_KEY")
+        return DeepgramTTS(settings.deepgram_api_key, voice=settings.tts_voice)
+    raise ValueError(f"Unknown TTS provider: {settings.tts_provider}")
+
+def create_stt_factory(settings) -> Callable[[], StreamingSTT]:
+    """Return a constructor for the recognizer selected by `settings.stt_provider`"""
+    provider = settings.stt_provider.lower()
+
+    if provider == "replay":
+        if not settings.stt_replay_path:
+            raise ValueError("STT_PROVIDER=replay requires STT_REPLAY_PATH")
+        return lambda: FileReplaySTT(settings.stt_replay_path)
+
+    if provider == "deepgram":
+        if not settings.deepgram_api_key:
+            raise ValueError("STT_PROVIDER=deepgram requires DEEPGRAM_API_KEY")
+        return lambda: DeepgramSTT(settings.deepgram_api_key)
+
+    raise ValueError(f"Unknown STT provider: {settings.stt_provider}")
@@ -0,0 +1,87 @@
+# tests/test_audio_processing.py
+"""Tests for the Twilio audio format conversions"""
+import base64
+import math
+import struct
+from array import array
+
+import pytest
+
+from utils.audio_processing import AudioProcessor, MediaChunkPipeline, Resampler, VoiceActivityDetector
+
+def test_mulaw_to_pcm_matches_table():
+    data = bytes(range(256))
+    expected = b''.join(struct.pack('<h', v) for v in AudioProcessor.MULAW_TO_LINEAR)
+    assert AudioProcessor.mulaw_to_pcm(data) == expected
+    assert AudioProcessor.mulaw_to_pcm(bytearray(data)) == expected
+    assert AudioProcessor.mulaw_to_pcm(memoryview(data)) == expected
+
+def test_mulaw_to_pcm_empty():
+    assert AudioProcessor.mulaw_to_pcm(b'') == b''
+
+def _sine(rate, seconds=1.0, freq=440.0, amplitude=10000):
+    count = int(rate * seconds)
+    return array('h', [
+        int(amplitude * math.sin(2 * math.pi * freq * n / rate)) for n in range(count)
+    ])
+
+def test_pcm_to_mulaw_round_trip():
+    pcm = AudioProcessor.mulaw_to_pcm(bytes(range(256)))
+    assert AudioProcessor.mulaw_to_pcm(AudioProcessor.pcm_to_mulaw(pcm)) == pcm
+
+def test_pcm_to_mulaw_clips_extremes():
+    pcm = struct.pack('<4h', 32767, -32768, 0, -1)
+    assert AudioProcessor.pcm_to_mulaw(pcm) == bytes([0x80, 0x00, 0xFF, 0x7F])
+
+@pytest.mark.parametrize("from_rate,to_rate", [
+    (8000, 16000), (16000, 8000), (44100, 8000), (8000, 24000),
+])
+def test_resample_audio_preserves_tone(from_rate, to_rate):
+    resampled = array('h', AudioProcessor.resample_audio(_sine(from_rate).tobytes(), from_rate, to_rate))
+    expected = _sine(to_rate)
+    assert len(resampled) == len(expected)
+    # Skip the edges, where the filter sees silence outside the buffer
+    assert max(abs(a - b) for a, b in zip(resampled[200:-200], expected[200:-200])) < 5
+
+def test_resampler_streaming_matches_one_shot():
+    pcm = _sine(8000).tobytes()
+    streamed = Resampler(8000, 16000)
+    # Odd frame size splits samples across chunks
+    chunks = [streamed.process(pcm[i:i + 321]) for i in range(0, len(pcm), 321)]
+    whole = Resampler(8000, 16000)
+    assert b''.join(chunks) + streamed.flush() == whole.process(pcm) + whole.flush()
+
+def test_media_chunk_pipeline_reassembles_frames():
+    mulaw = bytes(range(256)) * 7
+    pipeline = MediaChunkPipeline(chunk_ms=100)
+    chunks = []
+    for i in range(0, len(mulaw), 160):  # 20 ms Twilio frames
+        chunks += pipeline.push(base64.b64encode(mulaw[i:i + 160]).decode())
+    assert all(len(chunk) == pipeline.chunk_bytes for chunk in chunks)
+    chunks.append(pipeline.flush())
+    assert b''.join(chunks) == AudioProcessor.mulaw_to_pcm(mulaw)
+    assert pipeline.flush() is None
+
+def test_vad_zero_crossing_rate():
+    vad = VoiceActivityDetector()
+    _, zcr = vad.frame_features(_sine(8000, seconds=0.02, freq=1000).tobytes())
+    assert abs(zcr - 2 * 1000 / 8000) < 0.02
+
+def test_vad_speech_events_with_hangover():
+    vad = VoiceActivityDetector(hangover_ms=300)
+    silence = bytes(1600)  # 100 ms
+    speech = _sine(8000, seconds=0.1, freq=200).tobytes()
+    # A 200 ms pause is bridged by the hangover; 500 ms ends the utterance
+    audio = silence * 5 + speech * 5 + silence * 2 + speech * 3 + silence * 5
+    events = []
+    for i in range(0, len(audio), 320):
+        events += vad.process(audio[i:i + 320])
+    assert [e.kind for e in events] == ['speech_start', 'speech_end']
+    assert events[0].time_ms == 500
+    assert events[1].time_ms == 1500 + 300
+
+def test_vad_ignores_hiss():
+    vad = VoiceActivityDetector()
+    # Alternating samples: loud, but crossing zero every sample
+    hiss = array('h', [3000, -3000] * 800).tobytes()
+    assert vad.process(hiss) == []
@@ -0,0 +1,49 @@
+# tests/test_cache.py
+"""Tests for the TTL/LRU cache used by the services"""
+import time
+
+from utils.cache import TTLCache, normalize_text
+
+def test_normalize_text():
+    assert normalize_text("McGill University") == "mcgill university"
+    assert normalize_text("  mcgill   University. ") == "mcgill university"
+    assert normalize_text("McGill-University!") == "mcgill university"
+
+def test_hits_and_misses():
+    cache = TTLCache(maxsize=4, ttl=60)
+    assert cache.get("a") is None
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    assert cache.stats()['hits'] == 1
+    assert cache.stats()['misses'] == 1
+    assert cache.hit_ratio == 0.5
+
+def test_lru_eviction():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")  # "b" is now least recently used
+    cache.set("c", 3)
+    assert "b" not in cache
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.evictions == 1
+
+def test_ttl_expiry():
+    cache = TTLCache(maxsize=2, ttl=0.01)
+    cache.set("a", 1)
+    time.sleep(0.02)
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+def test_byte_budget():
+    cache = TTLCache(maxsize=10, ttl=60, max_bytes=10, sizeof=len)
+    cache.set("a", "xxxx")
+    cache.set("b", "yyyy")
+    cache.set("c", "zzzz")  # 12 bytes total, "a" has to go
+    assert "a" not in cache
+    assert cache.bytes == 8
+    cache.set("big", "x" * 11)  # Larger than the whole budget
+    assert "big" not in cache
+    assert cache.pop("b") == "yyyy"
+    assert cache.bytes == 4
@@ -0,0 +1,53 @@
+# tests/test_chat_history.py
+"""Tests for the bounded per-call Gemini conversation"""
+from services.chat_history import ChatHistory
+
+SEARCH = [{"name": "search_places", "args": {"query": "sushi", "location": "McGill"}}]
+
+def test_contents_include_window_and_new_message():
+    chat = ChatHistory(max_turns=2)
+    chat.add("hi", "Hello! How can I help?")
+    chat.add("find sushi near McGill", SEARCH)
+
+    assert chat.contents("what about ones with outdoor seating?") == [
+        {"role": "user", "parts": ["hi"]},
+        {"role": "model", "parts": ["Hello! How can I help?"]},
+        {"role": "user", "parts": ["find sushi near McGill"]},
+        {"role": "model", "parts": [
+            {"function_call": {"name": "search_places", "args": {"query": "sushi", "location": "McGill"}}}
+        ]},
+        {"role": "user", "parts": [
+            {"function_response": {"name": "search_places", "response": {"status": "done"}}},
+            "what about ones with outdoor seating?"
+        ]},
+    ]
+
+def test_old_turns_fold_into_notes():
+    chat = ChatHistory(max_turns=2)
+    chat.add("find sushi near McGill", SEARCH)
+    for i in range(5):
+        chat.add(f"question {i}", f"answer {i}")
+
+    contents = chat.contents("book it", "Montreal")
+    assert len(contents) == 5
+    assert contents[-1]["parts"][0] == (
+        "[Context: caller is near Montreal. earlier the caller searched for sushi near McGill]\nbook it"
+    )
+
+def test_from_messages_pairs_user_and_assistant():
+    chat = ChatHistory.from_messages([
+        {"role": "user", "content": "find sushi near McGill"},
+        {"role": "assistant", "content": "I found 5 places."},
+        {"role": "user", "content": "unanswered"},
+    ])
+    assert list(chat.turns) == [("find sushi near McGill", "I found 5 places.")]
+
+def test_recorded_results_are_sent_back_as_function_responses():
+    chat = ChatHistory()
+    chat.add("find sushi near McGill", [dict(call) for call in SEARCH])
+    chat.record_result("search_places", {"places": [{"name": "Kazu", "rating": 4.5}], "texted": True})
+
+    assert chat.contents("book the first one")[-1]["parts"][0] == {"function_response": {
+        "name": "search_places",
+        "response": {"places": [{"name": "Kazu", "rating": 4.5}], "texted": True}
+    }}
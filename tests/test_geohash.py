@@ -0,0 +1,19 @@
+# tests/test_geohash.py
+"""Tests for geohash tiles and distances"""
+import pytest
+
+from utils import geohash
+
+def test_encode_matches_reference():
+    assert geohash.encode(57.64911, 10.40744, 11) == "u4pruydqqvj"
+    assert geohash.encode(45.5048, -73.5772, 6) == "f25dve"
+
+def test_decode_returns_the_tile_center():
+    lat, lng = geohash.decode("u4pruydqqvj")
+    assert lat == pytest.approx(57.64911, abs=1e-4)
+    assert lng == pytest.approx(10.40744, abs=1e-4)
+    assert geohash.encode(*geohash.decode("f25dve"), 6) == "f25dve"
+
+def test_distance():
+    # 0.0018 degrees of latitude is about 200 m
+    assert geohash.distance_m(45.5048, -73.5772, 45.5066, -73.5772) == pytest.approx(200, rel=0.01)
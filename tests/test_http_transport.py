@@ -0,0 +1,60 @@
+# tests/test_http_transport.py
+"""Tests for the shared keep-alive HTTP transport"""
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from requests.adapters import HTTPAdapter
+
+from services.http_transport import HTTPTransport
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep connections open between requests
+
+    def do_GET(self):
+        body = b"ok"
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_port}"
+    httpd.shutdown()
+    httpd.server_close()
+
+def test_connections_are_reused_across_requests(server):
+    transport = HTTPTransport(pool_size=4)
+    for _ in range(5):
+        assert transport.session.get(server).text == "ok"
+
+    stats = next(iter(transport.stats().values()))
+    assert stats['requests'] == 5
+    assert stats['connections_opened'] == 1
+    assert stats['reuse_ratio'] == 0.8
+    assert stats['in_flight'] == 0
+    assert stats['peak_in_flight'] == 1
+    assert stats['idle'] == 1
+    transport.close()
+
+def test_default_timeout_applies(server, monkeypatch):
+    transport = HTTPTransport(connect_timeout=1.0, read_timeout=2.0)
+    seen = []
+    send = HTTPAdapter.send
+
+    def spy(self, request, timeout=None, **kwargs):
+        seen.append(timeout)
+        return send(self, request, timeout=timeout, **kwargs)
+
+    monkeypatch.setattr(HTTPAdapter, "send", spy)
+    transport.session.get(server)
+    transport.session.get(server, timeout=5)
+    assert seen == [(1.0, 2.0), 5]
+    transport.close()
@@ -0,0 +1,59 @@
+# tests/test_intent_cache.py
+"""Tests for the Gemini intent cache"""
+from services.intent_cache import IntentCache
+
+SEARCH = {
+    "type": "function_call",
+    "function_name": "search_places",
+    "function_args": {"query": "sushi restaurants", "location": "McGill University"}
+}
+
+def test_exact_and_similar_hits():
+    cache = IntentCache()
+    cache.set("Sushi restaurants near McGill University", None, SEARCH)
+
+    assert cache.get("sushi restaurants near mcgill university!") == SEARCH
+    assert cache.get("sushi near McGill") == SEARCH
+    assert cache.get("ramen near McGill") is None
+
+    stats = cache.stats()
+    assert (stats["exact_hits"], stats["similar_hits"], stats["misses"]) == (1, 1, 1)
+
+def test_keyed_by_location():
+    cache = IntentCache()
+    cache.set("book a table at Kazu", "McGill", SEARCH)
+    assert cache.get("book a table at Kazu", "Old Montreal") is None
+    assert cache.get("book a table at Kazu", "mcgill") == SEARCH
+
+def test_skips_contextual_and_text_responses():
+    cache = IntentCache()
+    cache.set("book a table there", "McGill", SEARCH)
+    cache.set("hello", "McGill", {"type": "text", "content": "Hi!"})
+    assert cache.get("book a table there", "McGill") is None
+    assert cache.get("hello", "McGill") is None
+
+def test_returns_copies():
+    cache = IntentCache()
+    cache.set("sushi near McGill", None, SEARCH)
+    cache.get("sushi near McGill")["function_args"]["query"] = "changed"
+    assert cache.get("sushi near McGill") == SEARCH
+
+def test_qualifiers_must_match():
+    cache = IntentCache()
+    cache.set("sushi near McGill", None, {
+        "type": "function_call",
+        "function_name": "search_places",
+        "function_args": {"query": "sushi", "location": "McGill"}
+    })
+    assert cache.get("cheap sushi near McGill") is None
+    assert cache.get("sushi with a patio near McGill") is None
+    assert cache.get("sushi near Concordia") is None
+    assert cache.get("sushi") is None  # No location said: Gemini may take it from context
+
+def test_skips_refinements():
+    cache = IntentCache()
+    cache.set("what about ramen near McGill", None, SEARCH)
+    cache.set("ramen near McGill", None, SEARCH)
+    assert cache.get("what about ramen near McGill") is None
+    assert cache.get("ramen near McGill instead") is None
+    assert cache.get("ramen near McGill") == SEARCH
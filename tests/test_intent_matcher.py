@@ -0,0 +1,42 @@
+# tests/test_intent_matcher.py
+"""Tests for the rule-based intent fast path"""
+import pytest
+
+from services.intent_matcher import IntentMatcher
+
+@pytest.mark.parametrize("utterance,query,location", [
+    ("Find sushi in New York", "sushi", "New York"),
+    ("I'm looking for sushi restaurants near McGill University", "sushi restaurants", "McGill University"),
+    ("can you find me a good coffee shop near the Old Port", "coffee shop", "the Old Port"),
+    ("sushi near McGill", "sushi", "McGill"),
+])
+def test_search(utterance, query, location):
+    result = IntentMatcher().match(utterance)
+    assert result == {
+        "type": "function_call",
+        "function_name": "search_places",
+        "function_args": {"query": query, "location": location}
+    }
+
+def test_reserve_uses_session_location():
+    result = IntentMatcher().match("Book a table for two at Joe Beef.", "McGill")
+    assert result["function_name"] == "get_reservation_info"
+    assert result["function_args"] == {"place_name": "Joe Beef", "location": "McGill"}
+
+@pytest.mark.parametrize("utterance", [
+    "Make a reservation",
+    "book a table there",
+    "find pizza near me",
+    "Yes, send me the list. And what about ones with outdoor seating?",
+    "What are the top attractions near Old Montreal?",
+    "Great, thanks!",
+])
+def test_falls_back_to_gemini(utterance):
+    assert IntentMatcher().match(utterance, "McGill") is None
+
+def test_hit_rate():
+    matcher = IntentMatcher()
+    matcher.match("find sushi near McGill")
+    matcher.match("thanks")
+    assert matcher.stats()["hits"] == 1
+    assert matcher.stats()["hit_rate"] == 0.5
@@ -0,0 +1,61 @@
+# tests/test_llm_streaming.py
+"""Tests for streaming Gemini replies sentence by sentence"""
+import asyncio
+import json
+from google.generativeai import protos
+from google.generativeai.types.generation_types import GenerateContentResponse
+
+from services.llm_service import LLMService, SentenceBuffer
+
+def text_chunk(text):
+    return GenerateContentResponse.from_response(protos.GenerateContentResponse(
+        candidates=[{"content": {"role": "model", "parts": [{"text": text}]}}]
+    ))
+
+class StreamingModel:
+    def __init__(self, text, size=5):
+        self.text = text
+        self.size = size
+
+    def generate_content(self, contents, stream=False, **kwargs):
+        assert stream
+        return iter([text_chunk(self.text[i:i + self.size])
+                     for i in range(0, len(self.text), self.size)])
+
+def stream(text):
+    llm = LLMService("test", max_workers=1, model=StreamingModel(text))
+    spoken = []
+
+    async def on_sentence(sentence):
+        spoken.append(sentence)
+
+    result = asyncio.run(llm.process_message("hello", [], on_sentence=on_sentence))
+    llm.executor.shutdown()
+    return result, spoken, llm
+
+def test_sentence_buffer_holds_short_fragments():
+    buffer = SentenceBuffer()
+    assert buffer.push("Sure. Kazu is rated 4.5 stars. It opens ") == ["Sure. Kazu is rated 4.5 stars."]
+    assert buffer.push("at 5 pm") == []
+    assert buffer.flush() == "It opens at 5 pm"
+
+def test_spoken_reply_streams_sentences():
+    result, spoken, llm = stream("Happy to help with that! Kazu is a great izakaya. It opens at 5 pm.")
+    assert spoken == ["Happy to help with that!", "Kazu is a great izakaya.", "It opens at 5 pm."]
+    assert result["streamed"] and result["content"].startswith("Happy")
+
+    stats = llm.streaming_stats()
+    assert stats["turns"] == 1 and stats["first_sentence_ms"]["p50"] is not None
+
+def test_json_action_is_not_spoken():
+    result, spoken, _ = stream(json.dumps({"action": "search", "query": "sushi", "location": "McGill"}))
+    assert spoken == []
+    assert result["function_name"] == "search_places"
+    assert result["function_args"] == {"query": "sushi", "location": "McGill"}
+
+def test_preamble_before_json_is_spoken_once():
+    action = json.dumps({"action": "search", "query": "sushi", "location": "McGill"})
+    result, spoken, _ = stream("Let me look that up for you. One sec " + action)
+    assert spoken == ["Let me look that up for you.", "One sec"]
+    assert result["function_name"] == "search_places"
+    assert "content" not in result
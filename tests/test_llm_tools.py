@@ -0,0 +1,56 @@
+# tests/test_llm_tools.py
+"""Tests for Gemini function calling in LLMService"""
+import asyncio
+
+from google.generativeai import protos
+from google.generativeai.types.generation_types import GenerateContentResponse
+
+from services.llm_service import LLMService
+
+def gemini_response(*parts):
+    return GenerateContentResponse.from_response(protos.GenerateContentResponse(
+        candidates=[{"content": {"role": "model", "parts": list(parts)}}]
+    ))
+
+class ToolModel:
+    def __init__(self, response):
+        self.response = response
+        self.contents = None
+
+    def generate_content(self, contents, **kwargs):
+        self.contents = contents
+        return self.response
+
+def process(*parts, history=()):
+    model = ToolModel(gemini_response(*parts))
+    llm = LLMService("test", max_workers=1, model=model)
+    result = asyncio.run(llm.process_message("find sushi near McGill and text me", list(history)))
+    llm.executor.shutdown()
+    return result
+
+def test_single_function_call():
+    result = process({"function_call": {"name": "search_places", "args": {"query": " sushi ", "location": "McGill"}}})
+    assert result == {
+        "type": "function_call",
+        "function_name": "search_places",
+        "function_args": {"query": "sushi", "location": "McGill"}
+    }
+
+def test_parallel_function_calls():
+    result = process(
+        {"function_call": {"name": "search_places", "args": {"query": "sushi", "location": "McGill"}}},
+        {"function_call": {"name": "send_sms", "args": {}}},
+    )
+    assert result["type"] == "function_calls"
+    assert [call["function_name"] for call in result["calls"]] == ["search_places", "send_sms"]
+    assert result["calls"][1]["function_args"] == {"message": ""}
+
+def test_invalid_calls_are_dropped():
+    result = process(
+        {"function_call": {"name": "search_places", "args": {"query": "sushi"}}},
+        {"function_call": {"name": "delete_everything", "args": {}}},
+    )
+    assert result["type"] == "text"
+
+def test_text_reply():
+    assert process({"text": "Hello! How can I help?"}) == {"type": "text", "content": "Hello! How can I help?"}
@@ -0,0 +1,177 @@
+# tests/test_maps_service.py
+"""Tests for tiered place details and request coalescing in the Maps service"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from services.maps_service import RESERVATION_DETAILS, SMS_DETAILS, MapsService
+
+class FakeClient:
+    def __init__(self):
+        self.details_calls = []
+
+    def geocode(self, location):
+        return [{"geometry": {"location": {"lat": 45.5, "lng": -73.57}}}]
+
+    def places_nearby(self, **kwargs):
+        return {"results": [
+            {"name": f"Place {i}", "vicinity": f"{i} Rue Sherbrooke", "rating": 4.5, "place_id": f"p{i}"}
+            for i in range(5)
+        ]}
+
+    def place(self, place_id, fields):
+        self.details_calls.append((place_id, tuple(fields)))
+        return {"result": {
+            "formatted_phone_number": f"555-010{place_id[-1]}",
+            "website": "https://www.opentable.com/kazu",
+            "url": f"https://maps.google.com/?cid={place_id}",
+            "reservable": True
+        }}
+
+def make_service(client):
+    return MapsService("test-key", details_concurrency=1, client=client)
+
+def test_speech_search_fetches_no_details():
+    client = FakeClient()
+    places = make_service(client).search_places("sushi", "McGill", detail_limit=0)
+
+    assert [place["name"] for place in places][:2] == ["Place 0", "Place 1"]
+    assert places[0]["address"] == "0 Rue Sherbrooke"
+    assert client.details_calls == []
+
+def test_default_search_fetches_no_details():
+    client = FakeClient()
+    make_service(client).search_places("sushi", "McGill")
+    assert client.details_calls == []
+
+def test_sms_tier_only_asks_for_phone_numbers():
+    client = FakeClient()
+    service = make_service(client)
+    places = service.search_places("sushi", "McGill", detail_limit=0)
+
+    service.fill_place_details(places, SMS_DETAILS, 3)
+
+    assert client.details_calls == [(f"p{i}", ("formatted_phone_number",)) for i in range(3)]
+    assert places[2]["phone"] == "555-0102"
+    assert "phone" not in places[3]
+
+def test_details_cache_only_requests_missing_fields():
+    client = FakeClient()
+    service = make_service(client)
+    places = service.search_places("sushi", "McGill", detail_limit=0)
+    service.fill_place_details(places, SMS_DETAILS, 1)
+
+    info = service.get_reservation_info("p0")
+    assert info["method"] == "online"
+    assert info["phone"] == "555-0100"
+    assert client.details_calls[1] == ("p0", ("website", "url", "reservable"))
+
+    # Everything reservations need is cached now
+    service.get_reservation_info("p0")
+    service.fill_place_details(places, RESERVATION_DETAILS, 1)
+    assert len(client.details_calls) == 2
+
+class SlowDetailsClient(FakeClient):
+    def __init__(self, delay):
+        super().__init__()
+        self.delay = delay
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.peak = 0
+
+    def place(self, place_id, fields):
+        with self.lock:
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+        time.sleep(self.delay)
+        with self.lock:
+            self.in_flight -= 1
+        return super().place(place_id, fields)
+
+def test_details_concurrency_is_capped_per_search():
+    client = SlowDetailsClient(0.05)
+    service = MapsService("test-key", details_concurrency=2, max_workers=8, client=client)
+    places = service.search_places("sushi", "McGill", detail_limit=0)
+
+    service.fill_place_details(places, SMS_DETAILS, 5)
+
+    assert client.peak == 2
+    assert [place["phone"] for place in places] == [f"555-010{i}" for i in range(5)]
+
+def test_details_past_the_deadline_are_left_out():
+    client = SlowDetailsClient(0.2)
+    service = MapsService("test-key", details_concurrency=3, details_timeout=0.05, max_workers=8, client=client)
+    places = service.search_places("sushi", "McGill", detail_limit=0)
+
+    started = time.monotonic()
+    service.fill_place_details(places, SMS_DETAILS, 5)
+    assert time.monotonic() - started < 0.15
+    filled = [place for place in places if "phone" in place]
+    assert len(filled) < 5
+
+    # Lookups still running when the deadline passed never touch the records
+    time.sleep(0.5)
+    assert [place for place in places if "phone" in place] == filled
+
+def test_sequential_details_keep_the_deadline():
+    client = SlowDetailsClient(0.2)
+    service = MapsService("test-key", details_concurrency=1, details_timeout=0.05, client=client)
+    places = service.search_places("sushi", "McGill", detail_limit=0)
+
+    started = time.monotonic()
+    service.fill_place_details(places, SMS_DETAILS, 5)
+    assert time.monotonic() - started < 0.15
+    assert client.peak == 1
+    assert not any("phone" in place for place in places)
+
+def test_concurrent_identical_searches_are_coalesced():
+    class SlowClient(FakeClient):
+        def places_nearby(self, **kwargs):
+            time.sleep(0.05)
+            return super().places_nearby(**kwargs)
+
+    client = SlowClient()
+    service = make_service(client)
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        searches = [
+            pool.submit(service.search_places, query, location, detail_limit=0)
+            for query, location in (("sushi", "McGill"), ("Sushi", "mcgill."), ("sushi", " McGill "))
+        ]
+        results = [search.result() for search in searches]
+
+    assert service.flights.stats()["search"] == {"upstream": 1, "saved": 2}
+    # Every caller gets its own records to add details to
+    results[0][0]["phone"] = "555-0100"
+    assert "phone" not in results[1][0]
+
+def test_nearby_results_are_shared_within_a_tile():
+    class CityClient(FakeClient):
+        POINTS = {"Peel": (45.5000, -73.5740), "Stanley": (45.5012, -73.5752), "Laval": (45.6066, -73.7124)}
+
+        def __init__(self):
+            super().__init__()
+            self.nearby_calls = []
+
+        def geocode(self, location):
+            lat, lng = self.POINTS[location]
+            return [{"geometry": {"location": {"lat": lat, "lng": lng}}}]
+
+        def places_nearby(self, location, **kwargs):
+            self.nearby_calls.append(location)
+            return {"results": [
+                {"name": name, "place_id": name, "geometry": {"location": {"lat": lat, "lng": lng}}}
+                for name, lat, lng in (("Far", 45.52, -73.60), ("Near Stanley", 45.5013, -73.5753), ("Near Peel", 45.5001, -73.5741))
+            ]}
+
+    client = CityClient()
+    service = make_service(client)
+
+    peel = service.search_places("coffee", "Peel", detail_limit=0)
+    stanley = service.search_places("Coffee!", "Stanley", detail_limit=0)
+    assert len(client.nearby_calls) == 1
+    assert [place["name"] for place in peel] == ["Near Peel", "Near Stanley", "Far"]
+    assert [place["name"] for place in stanley] == ["Near Stanley", "Near Peel", "Far"]
+    assert service.cache_stats()["nearby"]["hits"] == 1
+
+    service.search_places("coffee", "Laval", detail_limit=0)
+    assert len(client.nearby_calls) == 2
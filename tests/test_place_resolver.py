@@ -0,0 +1,47 @@
+# tests/test_place_resolver.py
+"""Tests for resolving reservation names against a call's recent places"""
+import pytest
+
+from services.place_resolver import PlaceResolver
+
+SUSHI = [
+    {"name": "Kazu Montreal", "place_id": "p1"},
+    {"name": "Sushi Momo", "place_id": "p2"},
+    {"name": "Jun I", "place_id": "p3"},
+]
+
+@pytest.fixture
+def session():
+    session = {}
+    PlaceResolver().remember(session, SUSHI)
+    return session
+
+@pytest.mark.parametrize("spoken,place_id", [
+    ("Kazu", "p1"),
+    ("kazu montreal restaurant", "p1"),
+    ("Sushi Momo's", "p2"),
+    ("sushi moma", "p2"),
+    ("the second one", "p2"),
+    ("the last one", "p3"),
+    ("top one", "p1"),
+])
+def test_resolves_recent_places(session, spoken, place_id):
+    assert PlaceResolver().resolve(session, spoken)["place_id"] == place_id
+
+@pytest.mark.parametrize("spoken", ["Ramen Ya", "the fifth one", "restaurant"])
+def test_unknown_names_fall_through(session, spoken):
+    assert PlaceResolver().resolve(session, spoken) is None
+
+def test_newer_results_come_first_and_are_bounded(session):
+    resolver = PlaceResolver(max_places=4)
+    resolver.remember(session, [{"name": "Ramen Ya", "place_id": "r1"}, {"name": "Jun I", "place_id": "p3"}])
+    assert [p["place_id"] for p in session["recent_places"]] == ["r1", "p3", "p1", "p2"]
+    assert resolver.resolve(session, "the second one")["place_id"] == "p3"
+    assert resolver.resolve(session, "Kazu")["place_id"] == "p1"
+
+def test_session_keeps_its_own_copies():
+    session = {}
+    places = [{"name": "Kazu", "place_id": "p1"}]
+    PlaceResolver().remember(session, places)
+    places[0]["phone"] = "555-0100"  # Filled in later by a details lookup
+    assert "phone" not in session["recent_places"][0]
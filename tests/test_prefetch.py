@@ -0,0 +1,83 @@
+# tests/test_prefetch.py
+"""Tests for warming search follow-ups"""
+import asyncio
+
+from services.prefetch import SearchPrefetcher
+from services.session_store import LocalRedis, RedisSessionStore
+
+PLACES = [
+    {"name": "Kazu", "place_id": "p1"},
+    {"name": "Sushi Momo", "place_id": "p2"},
+]
+
+class FakeMaps:
+    def __init__(self):
+        self.lookups = []
+        self.filled = []
+
+    async def get_reservation_info_async(self, place_id):
+        self.lookups.append(place_id)
+        await asyncio.sleep(0.01)
+        return {"place_id": place_id, "method": "phone", "phone": "555-0100"}
+
+    async def fill_place_details_async(self, places, fields, limit):
+        self.filled.extend(place["place_id"] for place in places[:limit])
+        for place in places[:limit]:
+            place["phone"] = "555-0199"
+
+class FakeSMS:
+    def format_places_sms(self, places):
+        return ", ".join(f"{place['name']} {place.get('phone')}" for place in places)
+
+def test_follow_ups_are_served_from_the_session():
+    maps = FakeMaps()
+    prefetcher = SearchPrefetcher(maps, FakeSMS())
+    session = {}
+
+    async def go():
+        prefetcher.start("CA1", session, "sushi", "McGill", [dict(place) for place in PLACES])
+        assert await prefetcher.sms_text("CA1", session) == "Kazu 555-0100, Sushi Momo 555-0199"
+        info = await prefetcher.reservation("CA1", session, "p1")
+        assert info["method"] == "phone"
+        assert await prefetcher.reservation("CA1", session, "p1") == info
+
+    asyncio.run(go())
+    # One Details lookup per listed place, the top one shared with the reservation
+    assert maps.lookups == ["p1"]
+    assert maps.filled == ["p2"]
+
+def test_new_search_cancels_the_old_prefetch():
+    prefetcher = SearchPrefetcher(FakeMaps(), FakeSMS())
+    session = {}
+
+    async def go():
+        prefetcher.start("CA1", session, "sushi", "McGill", [dict(place) for place in PLACES])
+        first = prefetcher._tasks.get("CA1")
+        prefetcher.start("CA1", session, "ramen", "McGill", [dict(PLACES[1])])
+        await asyncio.sleep(0)
+        assert first.cancelled()
+        assert await prefetcher.reservation("CA1", session, "p1") is None
+        assert (await prefetcher.reservation("CA1", session, "p2"))["place_id"] == "p2"
+
+    asyncio.run(go())
+
+def test_warmed_results_are_saved_to_the_session_store():
+    store = RedisSessionStore(LocalRedis(), ttl=60)
+    prefetcher = SearchPrefetcher(FakeMaps(), FakeSMS(), store=store)
+    places = [dict(place) for place in PLACES]
+    session = {"messages": []}
+
+    async def go():
+        prefetcher.start("CA1", session, "sushi", "McGill", places)
+        await store.save_async("CA1", session)  # The webhook saves before the prefetch is done
+        await prefetcher._tasks.get("CA1")
+
+    asyncio.run(go())
+    store.close()
+
+    # The caller's records and session are left alone; the stored copy has the results
+    assert "phone" not in places[1]
+    assert session["prefetch"]["sms"] is None
+    saved = store.get("CA1")["prefetch"]
+    assert saved["sms"] == "Kazu 555-0100, Sushi Momo 555-0199"
+    assert saved["places"][1]["phone"] == "555-0199"
@@ -0,0 +1,72 @@
+# tests/test_session_store.py
+"""Tests for the call session store backends"""
+import asyncio
+import time
+
+import pytest
+
+from services.session_store import (
+    LocalRedis,
+    MemorySessionStore,
+    RedisSessionStore,
+    SessionStore,
+    SQLiteSessionStore,
+)
+
+@pytest.fixture(params=["memory", "sqlite", "redis"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        store = MemorySessionStore(ttl=60)
+    elif request.param == "sqlite":
+        store = SQLiteSessionStore(str(tmp_path / "sessions.db"), ttl=60)
+    else:
+        store = RedisSessionStore(LocalRedis(), ttl=60)
+    yield store
+    store.close()
+
+def test_round_trip(store):
+    assert store.get("CA1") is None
+    store.save("CA1", {"caller": "+15145550100", "messages": [], "location": None})
+    session = store.get("CA1")
+    session["messages"].append({"role": "user", "content": "sushi near McGill"})
+    store.save("CA1", session)
+
+    assert store.get("CA1")["messages"][0]["content"] == "sushi near McGill"
+    assert len(store) == 1
+
+    store.delete("CA1")
+    assert store.get("CA1") is None
+    assert len(store) == 0
+
+def test_memory_idle_expiry():
+    store = MemorySessionStore(ttl=0.01)
+    store.save("CA1", {"messages": []})
+    time.sleep(0.02)
+    assert store.get("CA1") is None
+    assert len(store) == 0
+
+def test_memory_max_size():
+    store = MemorySessionStore(ttl=60, max_size=2)
+    for call_sid in ("CA1", "CA2", "CA3"):
+        store.save(call_sid, {"messages": []})
+    assert store.get("CA1") is None
+    assert len(store) == 2
+
+def test_async_access_runs_shared_backends_off_the_loop(store):
+    async def go():
+        await store.save_async("CA1", {"messages": []})
+        assert (await store.get_async("CA1")) == {"messages": []}
+        assert await store.count_async() == 1
+        await store.delete_async("CA1")
+        return await store.get_async("CA1")
+
+    assert asyncio.run(go()) is None
+    assert (store.executor is None) == isinstance(store, MemorySessionStore)
+
+def test_backends_must_implement_the_whole_interface():
+    class Partial(SessionStore):
+        def get(self, call_sid):
+            return None
+
+    with pytest.raises(TypeError):
+        Partial()
@@ -0,0 +1,48 @@
+# tests/test_singleflight.py
+"""Tests for coalescing concurrent identical calls"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from utils.singleflight import SingleFlight
+
+def test_concurrent_calls_share_one_upstream_call():
+    flights = SingleFlight()
+    calls = []
+    release = threading.Event()
+
+    def fetch(value):
+        calls.append(value)
+        release.wait(1)
+        return value * 2
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        futures = [pool.submit(flights.do, ("search", "sushi"), fetch, 21) for _ in range(4)]
+        time.sleep(0.05)
+        release.set()
+        results = [future.result() for future in futures]
+
+    assert calls == [21]
+    assert sorted(results, key=lambda r: r[1]) == [(42, False)] + [(42, True)] * 3
+    assert flights.stats() == {"search": {"upstream": 1, "saved": 3}}
+
+def test_errors_reach_every_waiter_and_are_not_kept():
+    flights = SingleFlight()
+    release = threading.Event()
+
+    def fail():
+        release.wait(1)
+        raise TimeoutError("upstream timed out")
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        futures = [pool.submit(flights.do, ("geocode", "mcgill"), fail) for _ in range(2)]
+        time.sleep(0.05)
+        release.set()
+        for future in futures:
+            with pytest.raises(TimeoutError):
+                future.result()
+
+    # The next call goes upstream again
+    assert flights.do(("geocode", "mcgill"), lambda: "ok") == ("ok", False)
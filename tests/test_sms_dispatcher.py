@@ -0,0 +1,89 @@
+# tests/test_sms_dispatcher.py
+"""Tests for the background SMS dispatcher"""
+import asyncio
+
+from twilio.base.exceptions import TwilioRestException
+
+from services.executor import BlockingExecutor
+from services.sms_dispatcher import SMSDispatcher, SMSSpool
+
+class FakeSMSService:
+    def __init__(self, failures=()):
+        self.executor = BlockingExecutor("test-twilio", 2)
+        self.failures = list(failures)
+        self.sent = []
+
+    def create_message(self, to_number, body):
+        if self.failures:
+            raise self.failures.pop(0)
+        self.sent.append((to_number, body))
+        return "SM1"
+
+def run(dispatcher, *messages):
+    async def go():
+        await dispatcher.start()
+        for to_number, body in messages:
+            await dispatcher.send(to_number, body)
+        await asyncio.wait_for(dispatcher.join(), 5)
+        await dispatcher.stop()
+    asyncio.run(go())
+    dispatcher.sms_service.executor.shutdown()
+
+def test_sends_and_dedupes():
+    service = FakeSMSService()
+    dispatcher = SMSDispatcher(service)
+    run(dispatcher, ("+1514", "hi"), ("+1514", "hi"), ("+1438", "hi"))
+    assert sorted(service.sent) == [("+1438", "hi"), ("+1514", "hi")]
+    assert dispatcher.stats()["deduped"] == 1
+
+def test_retries_transient_failures():
+    service = FakeSMSService([TwilioRestException(500, "uri"), ConnectionError("reset")])
+    dispatcher = SMSDispatcher(service, retry_base=0.01)
+    run(dispatcher, ("+1514", "hi"))
+    assert service.sent == [("+1514", "hi")]
+    assert dispatcher.stats()["retried"] == 2
+
+def test_gives_up_on_permanent_failures():
+    service = FakeSMSService([TwilioRestException(400, "uri", msg="invalid number")])
+    dispatcher = SMSDispatcher(service, retry_base=0.01)
+    run(dispatcher, ("+1514", "hi"))
+    assert service.sent == []
+    assert dispatcher.stats()["failed"] == 1
+
+def test_rate_limits_per_destination():
+    service = FakeSMSService()
+    dispatcher = SMSDispatcher(service, rate_per_minute=600, rate_burst=2)
+    run(dispatcher, *(("+1514", f"msg {i}") for i in range(4)), ("+1438", "other"))
+    assert len(service.sent) == 5
+    assert dispatcher.stats()["rate_limited"] >= 2
+
+def test_spool_resends_after_restart(tmp_path):
+    path = str(tmp_path / "spool.db")
+    spool = SMSSpool(path)
+    dispatcher = SMSDispatcher(FakeSMSService(), spool=spool)
+    asyncio.run(dispatcher.send("+1514", "left over"))  # Queued, but never started
+    dispatcher.sms_service.executor.shutdown()
+    spool.close()
+
+    service = FakeSMSService()
+    run(SMSDispatcher(service, spool=SMSSpool(path)))
+    assert service.sent == [("+1514", "left over")]
+    assert SMSSpool(path).pending() == []
+
+def test_text_dropped_on_a_full_queue_can_be_retried():
+    service = FakeSMSService()
+    dispatcher = SMSDispatcher(service, queue_size=1)
+
+    async def go():
+        assert await dispatcher.send("+1514", "first")
+        assert not await dispatcher.send("+1438", "second")  # Queue full, workers not started
+        await dispatcher.start()
+        await asyncio.wait_for(dispatcher.join(), 5)
+        assert await dispatcher.send("+1438", "second")
+        await asyncio.wait_for(dispatcher.join(), 5)
+        await dispatcher.stop()
+    asyncio.run(go())
+    service.executor.shutdown()
+
+    assert sorted(service.sent) == [("+1438", "second"), ("+1514", "first")]
+    assert dispatcher.stats()["deduped"] == 0
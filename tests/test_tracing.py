@@ -0,0 +1,89 @@
+# tests/test_tracing.py
+"""Tests for per-turn tracing and the /metrics histograms"""
+import asyncio
+import time
+
+from services.executor import BlockingExecutor
+from utils.tracing import Histogram, Tracer, span
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram("latency_seconds", "Latency", ("stage",), buckets=(0.1, 1.0))
+    for seconds in (0.05, 0.5, 2.0):
+        histogram.observe(seconds, "maps")
+
+    lines = histogram.render()
+    assert 'latency_seconds_bucket{stage="maps",le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{stage="maps",le="1.0"} 2' in lines
+    assert 'latency_seconds_bucket{stage="maps",le="+Inf"} 3' in lines
+    assert 'latency_seconds_count{stage="maps"} 3' in lines
+
+def test_turn_collects_spans_from_worker_threads():
+    tracer = Tracer()
+    executor = BlockingExecutor("test", 2)
+
+    def geocode():
+        with span("maps.geocode", "maps"):
+            return "ok"
+
+    async def go():
+        with tracer.turn("CA1"):
+            with span("functions"):
+                assert await executor.run(geocode) == "ok"
+            # A nested turn for the same call joins the outer one
+            with tracer.turn("CA1"):
+                with span("session.save"):
+                    pass
+
+    asyncio.run(go())
+    executor.shutdown()
+
+    (turn,) = tracer.waterfall("CA1")
+    stages = {s['stage']: s for s in turn['spans']}
+    assert set(stages) == {"functions", "maps.geocode", "session.save"}
+    assert stages["maps.geocode"]['parent'] == "functions"
+    assert stages["maps.geocode"]['dependency'] == "maps"
+    assert tracer.waterfall("CA2") is None
+
+    metrics = tracer.metrics()
+    assert 'call2map_stage_seconds_count{stage="maps.geocode",dependency="maps"} 1' in metrics
+    assert "call2map_turn_seconds_count 1" in metrics
+
+def test_slow_turns_are_counted_and_errors_recorded():
+    tracer = Tracer(slow_turn_ms=1)
+    try:
+        with tracer.turn("CA1"):
+            time.sleep(0.005)
+            with span("gemini.generate", "gemini"):
+                raise TimeoutError()
+    except TimeoutError:
+        pass
+
+    (turn,) = tracer.waterfall("CA1")
+    assert turn['spans'][0]['error'] == "TimeoutError"
+    assert tracer.slow_turns == 1
+
+def test_held_turn_finishes_when_handed_off_work_does():
+    tracer = Tracer()
+
+    async def background(trace):
+        try:
+            with tracer.turn("CA1"):
+                await asyncio.sleep(0.01)
+                with span("llm"):
+                    pass
+        finally:
+            trace.release()
+
+    async def go():
+        with tracer.turn("CA1", started=time.perf_counter()) as trace:
+            with span("webhook.form"):
+                pass
+            trace.hold()
+            task = asyncio.create_task(background(trace))
+        assert tracer.waterfall("CA1") is None  # Still answering
+        await task
+
+    asyncio.run(go())
+    (turn,) = tracer.waterfall("CA1")
+    assert [s["stage"] for s in turn["spans"]] == ["webhook.form", "llm"]
+    assert turn["duration_ms"] >= 10
@@ -0,0 +1,29 @@
+# tests/test_twiml.py
+"""Tests for the prebuilt TwiML documents"""
+import xml.etree.ElementTree as ET
+
+from utils.twiml import TwiMLBuilder
+
+BASE_URL = "https://call2map.example.com"
+builder = TwiMLBuilder(BASE_URL, "wss://call2map.example.com/voice/stream")
+
+def says(document):
+    return [say.text for say in ET.fromstring(document.encode()).iter("Say")]
+
+def test_reply_escapes_place_names():
+    document = builder.reply("I found Sushi & Co <Peel>.")
+    root = ET.fromstring(document.encode())
+    assert says(document)[0] == "I found Sushi & Co <Peel>."
+    assert root.find("Gather").get("action") == f"{BASE_URL}/voice/process-speech"
+
+def test_reply_and_continue_redirects():
+    document = builder.reply_and_continue(["One.", "Two & three."])
+    root = ET.fromstring(document.encode())
+    assert says(document) == ["One.", "Two & three."]
+    assert root.find("Redirect").text == f"{BASE_URL}/voice/continue"
+
+def test_static_documents_are_valid():
+    for document in (builder.greeting, builder.stream_greeting, builder.reply(), builder.hangup("Bye <3")):
+        ET.fromstring(document.encode())
+    stream = ET.fromstring(builder.reply_and_stream("Kazu & more").encode()).find("Connect/Stream")
+    assert stream.get("url") == "wss://call2map.example.com/voice/stream"
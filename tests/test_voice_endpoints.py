@@ -0,0 +1,143 @@
+# tests/test_voice_endpoints.py
+"""Tests for the Twilio webhooks and the Media Streams socket, end to end"""
+import base64
+import math
+import os
+import struct
+import tempfile
+import time
+import xml.etree.ElementTree as ET
+
+import pytest
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+REPLAY = tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False)
+REPLAY.write("hello there\n")
+REPLAY.close()
+
+# Settings are loaded when main is imported
+for key, value in (('TWILIO_ACCOUNT_SID', 'ACtest'), ('TWILIO_AUTH_TOKEN', 'test'),
+                   ('TWILIO_PHONE_NUMBER', '+15145550000'), ('GEMINI_API_KEY', 'test'),
+                   ('GOOGLE_MAPS_API_KEY', 'AIza-test')):
+    os.environ.setdefault(key, value)
+os.environ.update(VOICE_MODE="stream", STT_PROVIDER="replay", STT_REPLAY_PATH=REPLAY.name,
+                  TTS_PROVIDER="", VAD_HANGOVER_MS="200")
+
+from benchmarks.fakes import Counter, FakeGeminiModel, FakeMapsClient, FakeTwilioClient, Latency
+
+import main
+from utils.audio_processing import AudioProcessor
+
+# Gemini streams its reply a chunk every 0.1s, so the first sentence is
+# ready well before the rest
+NOW = Latency(0.0)
+CHUNK = Latency(0.1)
+
+class FakeTTS:
+    async def synthesize(self, text):
+        return b'\xff' * 1600
+
+    async def close(self):
+        pass
+
+@pytest.fixture(scope="module")
+def counter():
+    counter = Counter()
+    main.llm_service.model = FakeGeminiModel(NOW, CHUNK, counter)
+    main.maps_service.client = FakeMapsClient(NOW, NOW, NOW, counter)
+    main.sms_service.client = FakeTwilioClient(NOW, counter)
+    yield counter
+    os.unlink(REPLAY.name)
+
+@pytest.fixture(scope="module")
+def client(counter):
+    with TestClient(main.app) as client:
+        yield client
+
+def start_call(client, call_sid):
+    return client.post("/voice/incoming", data={"CallSid": call_sid, "From": "+15145551234"})
+
+def says(response):
+    return [say.text for say in ET.fromstring(response.text).iter("Say")]
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+def frames(seconds, amplitude):
+    """Base64 mu-law media payloads of a 440 Hz tone, 20 ms each"""
+    pcm = b''.join(
+        struct.pack('<h', int(amplitude * math.sin(2 * math.pi * 440 * i / 8000)))
+        for i in range(int(8000 * seconds))
+    )
+    mulaw = AudioProcessor.pcm_to_mulaw(pcm)
+    return [base64.b64encode(mulaw[i:i + 160]).decode() for i in range(0, len(mulaw), 160)]
+
+def send_media(ws, payloads):
+    for payload in payloads:
+        ws.send_json({"event": "media", "media": {"payload": payload}})
+
+def say_turn(ws, call_sid):
+    ws.send_json({"event": "start", "start": {"callSid": call_sid, "streamSid": f"MZ{call_sid}"}})
+    send_media(ws, frames(0.3, 10000) + frames(0.5, 0))
+
+def test_streamed_reply_redirects_then_listens(client):
+    start_call(client, "CAcontinue")
+
+    first = client.post("/voice/process-speech", data={"CallSid": "CAcontinue", "SpeechResult": "hi, how are you?"})
+    root = ET.fromstring(first.text)
+    assert says(first) == ["Happy to help with that."]
+    assert root.find("Redirect").text.endswith("/voice/continue")
+
+    rest = client.post("/voice/continue", data={"CallSid": "CAcontinue"})
+    root = ET.fromstring(rest.text)
+    assert "Is there anything else you need today?" in says(rest)
+    assert root.find("Gather") is not None and root.find("Redirect") is None
+    assert "CAcontinue" not in main.pending_replies
+
+def test_text_me_the_list_sends_an_sms(client, counter):
+    start_call(client, "CAsms")
+    client.post("/voice/process-speech", data={"CallSid": "CAsms", "SpeechResult": "I'm looking for sushi near McGill."})
+
+    reply = client.post("/voice/process-speech", data={"CallSid": "CAsms", "SpeechResult": "Can you text me the list?"})
+    assert "I've texted you the list." in says(reply)
+    wait_for(lambda: counter.counts.get("twilio.sms"))
+
+def test_media_stream_turn_is_answered(client, counter):
+    start_call(client, "CAstream")
+    updates = counter.counts.get("twilio.update_call", 0)
+
+    with client.websocket_connect("/voice/stream") as ws:
+        say_turn(ws, "CAstream")
+        # Without a synthesizer the reply is spoken with <Say> on the call
+        wait_for(lambda: counter.counts.get("twilio.update_call", 0) > updates)
+
+    messages = main.call_sessions.get("CAstream")["messages"]
+    assert messages[0] == {"role": "user", "content": "hello there"}
+    client.post("/voice/status", data={"CallSid": "CAstream", "CallStatus": "completed"})
+    assert "CAstream" not in main.recognizers
+
+def test_caller_barges_in_on_playback(client, monkeypatch):
+    monkeypatch.setattr(main, "tts_service", FakeTTS())
+    start_call(client, "CAbarge")
+
+    with client.websocket_connect("/voice/stream") as ws:
+        say_turn(ws, "CAbarge")
+        events = [ws.receive_json() for _ in range(4)]
+        assert [event["event"] for event in events] == ["media", "mark", "media", "mark"]
+
+        # Talking over the reply, whose marks Twilio never acknowledged
+        wait_for(lambda: main.call_sessions.get("CAbarge")["messages"][-1]["role"] != "user")
+        send_media(ws, frames(1.0, 10000))
+        assert ws.receive_json() == {"event": "clear", "streamSid": "MZCAbarge"}
+    client.post("/voice/status", data={"CallSid": "CAbarge", "CallStatus": "completed"})
+
+def test_media_stream_is_refused_in_gather_mode(client, monkeypatch):
+    monkeypatch.setattr(main, "stt_factory", None)
+    with pytest.raises(WebSocketDisconnect) as refused:
+        with client.websocket_connect("/voice/stream"):
+            pass
+    assert refused.value.code == 1008
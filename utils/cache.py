@@ -0,0 +1,129 @@
+# utils/cache.py
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+_WHITESPACE = re.compile(r"\s+")
+
+def json_size(value: Any) -> int:
+    """Approximate the memory held by a JSON-like value by its encoded size"""
+    return len(json.dumps(value, default=str))
+
+def normalize_text(text: str) -> str:
+    """Normalize free-form text for use as a cache key.
+
+    "McGill University", " mcgill  university. " and "McGill-University"
+    all map to "mcgill university".
+    """
+    text = _PUNCTUATION.sub(" ", text.lower())
+    return _WHITESPACE.sub(" ", text).strip()
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries also expire after `ttl` seconds.
+
+    Keeps hit/miss/eviction counters so callers can report on how well
+    the cache is doing. With `max_bytes` set, entries are also evicted to
+    keep the total `sizeof(value)` under that budget.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 256,
+        ttl: float = 3600.0,
+        max_bytes: Optional[int] = None,
+        sizeof: Callable[[Any], int] = json_size
+    ):
+        self.maxsize = max(1, maxsize)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._sizeof = sizeof
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the cached value, or `default` if it is missing or expired"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                expires_at, value, size = entry
+                if expires_at > now:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+                self.bytes -= size
+            self.misses += 1
+            return default
+
+    def set(self, key: Hashable, value: Any):
+        """Store a value, evicting the least recently used entries if full"""
+        size = self._sizeof(value) if self.max_bytes is not None else 0
+        if self.max_bytes is not None and size > self.max_bytes:
+            return  # Would evict everything else and still not fit
+
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self.bytes -= old[2]
+            self._data[key] = (time.monotonic() + self.ttl, value, size)
+            self.bytes += size
+            while len(self._data) > self.maxsize or (
+                self.max_bytes is not None and self.bytes > self.max_bytes
+            ):
+                _, evicted = self._data.popitem(last=False)
+                self.bytes -= evicted[2]
+                self.evictions += 1
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """Remove an entry and return its value"""
+        with self._lock:
+            entry = self._data.pop(key, None)
+            if entry is None:
+                return default
+            self.bytes -= entry[2]
+            return entry[1]
+
+    def items(self) -> List[Tuple[Hashable, Any]]:
+        """Snapshot of live entries, most recently used last (not counted as lookups)"""
+        now = time.monotonic()
+        with self._lock:
+            return [(key, entry[1]) for key, entry in self._data.items() if entry[0] > now]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        entry = self._data.get(key)
+        return entry is not None and entry[0] > time.monotonic()
+
+    @property
+    def hit_ratio(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self) -> Dict[str, Optional[float]]:
+        """Counters for logging or a status endpoint"""
+        return {
+            'size': len(self._data),
+            'maxsize': self.maxsize,
+            'bytes': self.bytes,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_ratio': round(self.hit_ratio, 3)
+        }
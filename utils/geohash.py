@@ -0,0 +1,57 @@
+# utils/geohash.py
+import math
+from typing import Tuple
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+_DECODE = {char: i for i, char in enumerate(_BASE32)}
+
+EARTH_RADIUS_M = 6371000.0
+
+def encode(lat: float, lng: float, precision: int = 6) -> str:
+    """Geohash of a point; each extra character makes the tile ~32x smaller.
+
+    Precision 5 tiles are about 4.9 x 4.9 km, 6 about 1.2 x 0.6 km and
+    7 about 150 x 150 m.
+    """
+    lat_range, lng_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, value, even = [], 0, 0, True
+    while len(chars) < precision:
+        # Bits alternate between longitude and latitude, longitude first
+        rng, coord = (lng_range, lng) if even else (lat_range, lat)
+        mid = (rng[0] + rng[1]) / 2
+        if coord >= mid:
+            value = (value << 1) | 1
+            rng[0] = mid
+        else:
+            value <<= 1
+            rng[1] = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(_BASE32[value])
+            bits, value = 0, 0
+    return "".join(chars)
+
+def decode(geohash: str) -> Tuple[float, float]:
+    """Center (lat, lng) of a geohash tile"""
+    lat_range, lng_range = [-90.0, 90.0], [-180.0, 180.0]
+    even = True
+    for char in geohash:
+        value = _DECODE[char]
+        for shift in range(4, -1, -1):
+            rng = lng_range if even else lat_range
+            mid = (rng[0] + rng[1]) / 2
+            if value >> shift & 1:
+                rng[0] = mid
+            else:
+                rng[1] = mid
+            even = not even
+    return (lat_range[0] + lat_range[1]) / 2, (lng_range[0] + lng_range[1]) / 2
+
+def distance_m(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """Great-circle distance in meters"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlmb = math.radians(lng2 - lng1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(math.sqrt(a))
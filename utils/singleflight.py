@@ -0,0 +1,55 @@
+# utils/singleflight.py
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+class SingleFlight:
+    """Collapse concurrent calls with the same key into one upstream call.
+
+    The first caller for a key runs the function; callers arriving while it
+    is still running wait for its result (or exception) instead of making
+    the same request again. Nothing is kept once the call finishes, which
+    is the caches' job. Keys are tuples whose first item names the kind of
+    call, and `stats` counts upstream calls and saved calls per kind.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, Future] = {}
+        self.upstream: Dict[str, int] = {}
+        self.saved: Dict[str, int] = {}
+
+    def do(self, key: Tuple, func: Callable[..., Any], *args, **kwargs) -> Tuple[Any, bool]:
+        """Return (result, shared); `shared` is True if another caller's call was reused"""
+        kind = key[0]
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+                self.upstream[kind] = self.upstream.get(kind, 0) + 1
+            else:
+                self.saved[kind] = self.saved.get(kind, 0) + 1
+
+        if not leader:
+            return future.result(), True
+
+        try:
+            result = func(*args, **kwargs)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result, False
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+    def stats(self) -> Dict:
+        """Upstream calls made and calls saved by sharing, per kind"""
+        with self._lock:
+            return {
+                kind: {'upstream': self.upstream.get(kind, 0), 'saved': self.saved.get(kind, 0)}
+                for kind in sorted(set(self.upstream) | set(self.saved))
+            }
@@ -0,0 +1,216 @@
+# utils/tracing.py
+import contextvars
+import json
+import logging
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from utils.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# Seconds; dependency calls sit between a few ms (cache, SQLite) and seconds (Gemini)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+class Histogram:
+    """Prometheus-style latency histogram, one series per label combination"""
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [count per bucket (last is +Inf)..., sum]
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float, *label_values: str):
+        index = bisect_left(self.buckets, seconds)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += seconds
+
+    def render(self) -> List[str]:
+        """The histogram in the Prometheus text exposition format"""
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = sorted((key, list(values)) for key, values in self._series.items())
+        for label_values, values in series:
+            labels = ",".join(f'{name}="{value}"' for name, value in zip(self.labels, label_values))
+            prefix = labels + "," if labels else ""
+            total = 0
+            for bound, count in zip(self.buckets + (float("inf"),), values):
+                total += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'{self.name}_bucket{{{prefix}le="{le}"}} {total}')
+            suffix = f"{{{labels}}}" if labels else ""
+            lines.append(f"{self.name}_sum{suffix} {values[-1]:.6f}")
+            lines.append(f"{self.name}_count{suffix} {total}")
+        return lines
+
+@dataclass
+class Span:
+    stage: str
+    dependency: Optional[str]
+    parent: Optional[str]
+    start_ms: float
+    duration_ms: float
+    error: Optional[str] = None
+
+class Trace:
+    """The spans of one caller turn, with offsets from the start of the turn"""
+
+    def __init__(self, call_sid: str, tracer: "Tracer", started: Optional[float] = None):
+        self.call_sid = call_sid
+        self.tracer = tracer
+        self.started = started if started is not None else time.perf_counter()
+        self.wall_time = time.time() - (time.perf_counter() - self.started)
+        self.duration_ms: Optional[float] = None
+        self.spans: List[Span] = []
+        self._holds = 1
+
+    def hold(self):
+        """Keep the turn open past its `with` block, for work it hands off"""
+        self._holds += 1
+
+    def release(self):
+        """End a hold; the turn is finished once nothing holds it"""
+        self._holds -= 1
+        if self._holds == 0:
+            self.tracer._finish(self)
+
+    def to_dict(self) -> Dict:
+        return {
+            'call_sid': self.call_sid,
+            'started_at': round(self.wall_time, 3),
+            'duration_ms': self.duration_ms,
+            'spans': [asdict(span) for span in sorted(self.spans, key=lambda s: s.start_ms)]
+        }
+
+_trace: contextvars.ContextVar[Optional[Trace]] = contextvars.ContextVar("trace", default=None)
+_parent: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("span_parent", default=None)
+_default_tracer: Optional["Tracer"] = None
+
+class Tracer:
+    """Per-turn span tracing keyed by CallSid.
+
+    `turn` opens a trace for one caller turn; `span` and `record` add
+    stages to it from anywhere the turn's context reaches, including the
+    services' worker threads. Every span also feeds a latency histogram
+    by stage and dependency for `/metrics`. The last `turns_per_call`
+    waterfalls of each call are kept, and turns slower than `slow_turn_ms`
+    are logged as JSON.
+    """
+
+    def __init__(
+        self,
+        max_calls: int = 1000,
+        ttl: float = 1800.0,
+        turns_per_call: int = 20,
+        slow_turn_ms: float = 4000.0
+    ):
+        self.turns_per_call = turns_per_call
+        self.slow_turn_ms = slow_turn_ms
+        self.calls = TTLCache(maxsize=max_calls, ttl=ttl)
+        self.stage_seconds = Histogram(
+            "call2map_stage_seconds",
+            "Time spent in each stage of a caller turn",
+            ("stage", "dependency")
+        )
+        self.turn_seconds = Histogram("call2map_turn_seconds", "Time to answer a caller turn")
+        self.slow_turns = 0
+
+    def install(self):
+        """Make this the tracer for spans recorded outside any turn (background work)"""
+        global _default_tracer
+        _default_tracer = self
+
+    @contextmanager
+    def turn(self, call_sid: str, started: Optional[float] = None) -> Iterator[Trace]:
+        """Trace one turn of `call_sid`; nested calls for the same call join it"""
+        current = _trace.get()
+        if current is not None and current.call_sid == call_sid:
+            yield current
+            return
+
+        trace = Trace(call_sid, self, started)
+        token = _trace.set(trace)
+        try:
+            yield trace
+        finally:
+            _trace.reset(token)
+            trace.release()
+
+    def _finish(self, trace: Trace):
+        seconds = time.perf_counter() - trace.started
+        trace.duration_ms = round(seconds * 1000, 1)
+        self.turn_seconds.observe(seconds)
+
+        turns = self.calls.get(trace.call_sid)
+        if turns is None:
+            turns = deque(maxlen=self.turns_per_call)
+            self.calls.set(trace.call_sid, turns)
+        turns.append(trace)
+
+        if trace.duration_ms > self.slow_turn_ms:
+            self.slow_turns += 1
+            logger.warning(f"Slow turn ({trace.duration_ms}ms): {json.dumps(trace.to_dict())}")
+
+    def waterfall(self, call_sid: str) -> Optional[List[Dict]]:
+        """The call's recent turns with their spans, oldest first"""
+        turns = self.calls.get(call_sid)
+        return [trace.to_dict() for trace in turns] if turns is not None else None
+
+    def metrics(self) -> str:
+        """Prometheus text exposition of the latency histograms"""
+        lines = self.stage_seconds.render() + self.turn_seconds.render()
+        lines += [
+            "# HELP call2map_slow_turns_total Turns slower than the slow-turn threshold",
+            "# TYPE call2map_slow_turns_total counter",
+            f"call2map_slow_turns_total {self.slow_turns}"
+        ]
+        return "\n".join(lines) + "\n"
+
+def record(stage: str, start: float, end: float, dependency: Optional[str] = None, error: Optional[str] = None):
+    """Add a stage timed with time.perf_counter() to the current turn"""
+    trace = _trace.get()
+    tracer = trace.tracer if trace is not None else _default_tracer
+    if tracer is None:
+        return
+    tracer.stage_seconds.observe(end - start, stage, dependency or "")
+    if trace is not None:
+        trace.spans.append(Span(
+            stage=stage,
+            dependency=dependency,
+            parent=_parent.get(),
+            start_ms=round((start - trace.started) * 1000, 1),
+            duration_ms=round((end - start) * 1000, 1),
+            error=error
+        ))
+
+@contextmanager
+def span(stage: str, dependency: Optional[str] = None) -> Iterator[None]:
+    """Time the enclosed block as `stage` of the current turn.
+
+    `dependency` names the external service it waits on ("maps",
+    "gemini", "twilio"), and labels the stage in `/metrics`.
+    """
+    token = _parent.set(stage)
+    start = time.perf_counter()
+    error = None
+    try:
+        yield
+    except BaseException as e:
+        error = type(e).__name__
+        raise
+    finally:
+        _parent.reset(token)
+        record(stage, start, time.perf_counter(), dependency, error)
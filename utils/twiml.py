@@ -0,0 +1,101 @@
+# utils/twiml.py
+from typing import Iterable, Optional
+from xml.sax.saxutils import quoteattr
+
+XML_DECLARATION = '<?xml version="1.0" encoding="UTF-8"?>\n'
+
+GREETING = (
+    "Hello! Welcome to Call 2 Map. I'm your A I assistant. "
+    "I can help you find restaurants, stores, and other places near you."
+)
+ASK = "How can I help you today?"
+NO_INPUT = "I didn't hear anything. Please call back if you need assistance. Goodbye!"
+ANYTHING_ELSE = "Is there anything else I can help you with?"
+GOODBYE = "Thank you for using Call 2 Map. Goodbye!"
+
+def escape(text: str) -> str:
+    """Escape &, < and > for XML text, skipping the work when there are none"""
+    if "&" in text:
+        text = text.replace("&", "&amp;")
+    if "<" in text:
+        text = text.replace("<", "&lt;")
+    if ">" in text:
+        text = text.replace(">", "&gt;")
+    return text
+
+class TwiMLBuilder:
+    """TwiML documents for the voice webhooks.
+
+    Everything that only depends on settings (the greetings, the <Gather>
+    blocks with `base_url`, the stream URL) is rendered once up front.
+    A response then only escapes the dynamic text and joins it between
+    the prebuilt fragments.
+    """
+
+    def __init__(self, base_url: str, stream_url: Optional[str] = None, voice: str = "Polly.Joanna"):
+        self._say_open = f"\n    <Say voice={quoteattr(voice)}>"
+        process_speech = quoteattr(f"{base_url}/voice/process-speech")
+
+        self._connect = (
+            f"\n    <Connect>\n        <Stream url={quoteattr(stream_url)}/>\n    </Connect>"
+            if stream_url else ""
+        )
+        self._next_turn = (
+            f'\n    <Gather input="speech" timeout="8" speechTimeout="auto" action={process_speech} method="POST">'
+            f"\n        <Say voice={quoteattr(voice)}>{escape(ANYTHING_ELSE)}</Say>"
+            "\n    </Gather>"
+            f"{self.say(GOODBYE)}"
+            "\n</Response>"
+        )
+        self._continue = (
+            f'\n    <Redirect method="POST">{escape(base_url)}/voice/continue</Redirect>'
+            "\n</Response>"
+        )
+        self._open = XML_DECLARATION + "<Response>"
+
+        self.greeting = self._open + self.say(GREETING) + (
+            f'\n    <Gather input="speech" timeout="5" speechTimeout="auto" action={process_speech} method="POST">'
+            f"\n        <Say voice={quoteattr(voice)}>{escape(ASK)}</Say>"
+            "\n    </Gather>"
+            f"{self.say(NO_INPUT)}"
+            "\n</Response>"
+        )
+        self.stream_greeting = self._open + self.say(f"{GREETING} {ASK}") + self._connect + "\n</Response>"
+
+        # Documents are one escaped text between two prebuilt halves
+        self._head = self._open + self._say_open
+        self._between = "</Say>" + self._say_open
+        self._reply_tail = "</Say>" + self._next_turn
+        self._continue_tail = "</Say>" + self._continue
+        self._stream_tail = "</Say>" + self._connect + "\n</Response>"
+        self._hangup_tail = "</Say>\n    <Hangup/>\n</Response>"
+
+    def say(self, text: str) -> str:
+        """One escaped <Say> element"""
+        return f"{self._say_open}{escape(text)}</Say>"
+
+    def _says(self, sentences: Iterable[str]) -> str:
+        return self._between.join([escape(sentence) for sentence in sentences])
+
+    def reply(self, *sentences: str) -> str:
+        """Say the reply, then listen for the caller's next request"""
+        if len(sentences) == 1:
+            return self._head + escape(sentences[0]) + self._reply_tail
+        if not sentences:
+            return self._open + self._next_turn
+        return self._head + self._says(sentences) + self._reply_tail
+
+    def reply_and_continue(self, sentences: Iterable[str]) -> str:
+        """Say what is ready of a streamed reply and come back for the rest"""
+        sentences = list(sentences)
+        if not sentences:
+            return self._open + self._continue
+        return self._head + self._says(sentences) + self._continue_tail
+
+    def reply_and_stream(self, text: str) -> str:
+        """Say the reply, then reconnect the media stream"""
+        return self._head + escape(text) + self._stream_tail
+
+    def hangup(self, message: str) -> str:
+        """Say something and end the call"""
+        return self._head + escape(message) + self._hangup_tail